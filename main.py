@@ -3,21 +3,59 @@ import sys
 import math
 import datetime
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from src.pexels import PexelsAPI
 from src.pixabay import PixabayAPI
+from src.jamento import JamendoAPI
+from src.freesound import FreesoundAPI
 from src.googleVoice import GoogleVoice
 from src.videomaker import VideoMaker
 from src.uploadYoutube import YouTubeUploader
 from src.uploadTiktok import TikTokUploader
 from src.roteiroProcessor import RoteiroProcessor
+from src.scriptDocument import ScriptDocument
+from src.pipelineExecutor import ExecutorPipeline
+from src.jobWorkspace import EspacoTrabalho
+from src.batchRenderer import RenderizadorLote, RENDER_PROCESSES
+from src.clipPlanner import ClipPlanner
+from src.renditionSelector import RenditionSelector
+from src.federatedSearch import BuscaFederada
+from src.musicLibrary import BibliotecaMusical
+from src.httpClient import obter_cliente_http
+from src.downloadManager import GerenciadorDownloads
+from src.mediaCache import MediaCache
+from src.partialFetch import BaixadorParcial
+from src.mediaValidator import ValidadorMidia
+from src.transcodeWorker import TranscodeWorker, obter_executor_transcodificacao
+from src.searchCache import obter_cache_busca
 
 load_dotenv()
 
 PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
 PIXABAY_API_KEY = os.getenv("PIXABAY_API_KEY")
+JAMENDO_CLIENT_ID = os.getenv("JAMENDO_CLIENT_ID")
+FREESOUND_API_KEY = os.getenv("FREESOUND_API_KEY")
 DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", "downloads")
 SCRIPT_PATH = os.getenv("SCRIPT_PATH", "scripts")
+USE_MEDIA_CACHE = os.getenv("USE_MEDIA_CACHE", "true").lower() == "true"
+PARTIAL_INGEST = os.getenv("PARTIAL_INGEST", "true").lower() == "true"
+MAX_REPLACEMENT_ROUNDS = int(os.getenv("MAX_REPLACEMENT_ROUNDS", "2"))
+PRE_TRANSCODE = os.getenv("PRE_TRANSCODE", "true").lower() == "true"
+# One quarantine for every job: workspaces are deleted after publishing, broken clips are kept for analysis
+QUARANTINE_DIR = os.getenv("QUARANTINE_DIR", os.path.join(DOWNLOAD_DIR, "quarantine"))
+PREFLIGHT_ESTIMATE = os.getenv("PREFLIGHT_ESTIMATE", "true").lower() == "true"
+# Workers per pipeline stage and how many scripts may wait between two stages. Publishing stays
+# at one worker by default: the YouTube schedule slot and the TikTok browser profile are shared
+PIPELINE_TTS_WORKERS = int(os.getenv("PIPELINE_TTS_WORKERS", "1"))
+PIPELINE_INGEST_WORKERS = int(os.getenv("PIPELINE_INGEST_WORKERS", "1"))
+PIPELINE_RENDER_WORKERS = int(os.getenv("PIPELINE_RENDER_WORKERS") or RENDER_PROCESSES)  # One per render process
+PIPELINE_PUBLISH_WORKERS = int(os.getenv("PIPELINE_PUBLISH_WORKERS", "1"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1"))
+TEMPO_MAXIMO_POR_VIDEO = 10
+KEEP_WORKSPACES = os.getenv("KEEP_WORKSPACES", "false").lower() == "true"
+MUSIC_MOODS = [humor.strip() for humor in os.getenv("MUSIC_MOODS", "").split(",") if humor.strip()]
 
 def main():
     
@@ -40,7 +78,9 @@ def main():
         print("\n🔧✅ TikTok test passed in `main.py`.")
         
     print("\n🔧 Testing Google Voice environment")
-    if not GoogleVoice().testar_ambiente():
+    # One instance for the whole run, so the TTS client (gRPC channel) is created once
+    google_voice = GoogleVoice()
+    if not google_voice.testar_ambiente():
         print("\n🆘 Google Voice test failed in `main.py`.")
         sys.exit(1)
     else:
@@ -48,115 +88,211 @@ def main():
         
     print("\n📰 Splitting scripts")
     processor = RoteiroProcessor(os.path.join("scripts", "roteiro.txt"))
-    processor.processar()
+    # Streams the batch and only rewrites scripts that changed since the last export
     processor.exportar("scripts")
     # processor.deletar_arquivo_original()
     print("📰 Scripts processed\n")
 
+    print("🎵 Loading music library")
+    biblioteca_musical = carregar_biblioteca_musical()
+    print(f"🎵 {biblioteca_musical.quantidade()} tracks indexed\n")
+
     print("📹 Starting video generation\n\n")
-    for arquivo in os.listdir(SCRIPT_PATH):
-        if arquivo == "roteiro.txt":
+    # Each script flows through TTS, ingest, render and publish; while one script renders the
+    # next one is synthesizing/downloading and the previous one uploading
+    executor_tts = ThreadPoolExecutor(max_workers=PIPELINE_TTS_WORKERS)
+    if PREFLIGHT_ESTIMATE:
+        # Ingest is sized from the estimate, so it does not wait for TTS: each script's synthesis
+        # is started on the TTS pool as the script enters the pipeline (novos_trabalhos), and the
+        # ingest stage downloads footage while it runs
+        etapas = [("tts+ingest", lambda trabalho: etapa_ingest(trabalho, google_voice), PIPELINE_INGEST_WORKERS)]
+    else:
+        etapas = [
+            ("tts", lambda trabalho: etapa_tts(trabalho, google_voice), PIPELINE_TTS_WORKERS),
+            ("ingest", lambda trabalho: etapa_ingest(trabalho, google_voice), PIPELINE_INGEST_WORKERS),
+        ]
+    etapas += [
+        ("render", lambda trabalho: etapa_render(trabalho, biblioteca_musical, renderizador), PIPELINE_RENDER_WORKERS),
+        ("publish", etapa_publicar, PIPELINE_PUBLISH_WORKERS),
+    ]
+    # Up to RENDER_PROCESSES videos render at once, each in its own process
+    renderizador = RenderizadorLote(RENDER_PROCESSES)
+    pipeline = ExecutorPipeline(etapas, capacidade_fila=PIPELINE_QUEUE_SIZE)
+    try:
+        concluidos = pipeline.executar(novos_trabalhos(google_voice, executor_tts if PREFLIGHT_ESTIMATE else None))
+    finally:
+        renderizador.fechar()
+        executor_tts.shutdown()
+        # The batch is over: don't keep the process alive for the rest of the library ingest
+        biblioteca_musical.parar_ingestao()
+    print(f"\n📹 {len(concluidos)} videos published")
+    for etapa, estatisticas in pipeline.estatisticas().items():
+        print(f"⏱️ {etapa}: {estatisticas['concluidos']} done, {estatisticas['falhas']} failed, {estatisticas['tempo_ocupado']:.0f}s busy")
+
+    # Move videos from output to output_backup
+    for arquivo in os.listdir("output"):
+        try:
+            video_path = os.path.join("output", arquivo)
+            shutil.move(video_path, os.path.join("output_backup", arquivo))
+        except Exception as e:
+            print(f"Error moving file {arquivo} to output_backup: {e}")
             continue
+    
+def novos_trabalhos(google_voice=None, executor_tts=None):
+    """
+    One job per exported script, parsed once; every stage gets the same document.
 
-        print(f"\nGenerating video for {arquivo}")
+    With `executor_tts`, each job's TTS is submitted there as the job is created, so up to
+    PIPELINE_TTS_WORKERS scripts synthesize at once independently of the ingest workers. The
+    pipeline's backpressure still bounds the lookahead: a job is only created once the first
+    queue (PIPELINE_QUEUE_SIZE) has room.
+    """
+    for arquivo in os.listdir(SCRIPT_PATH):
         roteiro_path = os.path.join(SCRIPT_PATH, arquivo)
-
-        if not os.path.isfile(roteiro_path):
+        # Only finished scripts: a crashed export can leave a <name>.txt.tmp behind
+        if arquivo == "roteiro.txt" or not arquivo.endswith(".txt") or not os.path.isfile(roteiro_path):
             continue
+        print(f"\nGenerating video for {arquivo}")
+        # Jobs run side by side, so each one gets its own clean workspace (audio, clips, renders)
+        trabalho = {
+            "arquivo": arquivo,
+            "roteiro_path": roteiro_path,
+            "documento": ScriptDocument.carregar(roteiro_path),
+            "espaco": EspacoTrabalho(arquivo).preparar(),
+            "usados": set(),  # (provider, id) of every clip already planned for this script
+            "contador_videos": 0,
+        }
+        if executor_tts:
+            trabalho['futuro_tts'] = executor_tts.submit(etapa_tts, trabalho, google_voice)
+        yield trabalho
 
-        print(f"\n=== 🔊 Generating audio for file: {arquivo} ===")
+def etapa_tts(trabalho, google_voice):
+    print(f"\n=== 🔊 Generating audio for file: {trabalho['arquivo']} ===")
+    tempo_total = google_voice.processar_roteiro(trabalho['documento'], diretorio_saida=trabalho['espaco'].audio_dir)
+    print(f"\n=== 🔊 Total audio generated for {trabalho['arquivo']}: {tempo_total:.2f} seconds ===")
+    trabalho['tempo_total'] = tempo_total
+    trabalho['tempo_total_desejado'] = math.ceil(tempo_total / 10) * 10
+    return trabalho
 
-        google_voice = GoogleVoice()
-        tempo_total = google_voice.processar_roteiro(roteiro_path)
-        print(f"\n=== 🔊 Total audio generated: {tempo_total:.2f} seconds ===")
+def etapa_ingest(trabalho, google_voice):
+    """
+    Download the footage. If the job's TTS is still running (pre-flight), the footage is sized
+    from the estimate and, once TTS finishes, only the missing seconds are topped up.
+    """
+    query = trabalho['documento'].busca
+    futuro_tts = trabalho.pop('futuro_tts', None)
+    if futuro_tts is not None and futuro_tts.done():
+        futuro_tts.result()  # Already synthesized (or failed): no need for the estimate
+        futuro_tts = None
+    if futuro_tts is None:
+        tempo_desejado = trabalho['tempo_total_desejado']
+    else:
+        # Pre-flight: size the footage from the estimated narration length
+        tempo_estimado = google_voice.estimar_duracao(trabalho['documento'])
+        print(f"\n=== 🔊 Estimated narration for {trabalho['arquivo']}: {tempo_estimado:.2f} seconds ===")
+        tempo_desejado = math.ceil(tempo_estimado / 10) * 10
 
-        query = find_value(roteiro_path, "SEARCH:")
-        buscar_imagens = False
-        tempo_total_desejado = math.ceil(tempo_total / 10) * 10
-        tempo_maximo_por_video = 10
+    print(f"\n=== 📼 Searching videos on all providers: '{query}' ===")
+    trabalho['contador_videos'] = buscar_videos_federado(
+        query, tempo_desejado, TEMPO_MAXIMO_POR_VIDEO, trabalho['contador_videos'],
+        usados=trabalho['usados'], diretorio=trabalho['espaco'].download_dir,
+    )
 
-        print(f"\n=== 📼 Searching videos on Pexels: '{query}' ===")
-        contador_videos = pexels(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video)
-        print(f"\n=== 📼 Pexels video search completed! ===")
-        # print(f"\n=== Testing Pixabay API with query: '{query}' ===")
-        # pixabay(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video, contador_videos)
+    if futuro_tts:
+        futuro_tts.result()
+        # Fetch only what the estimate left short
+        if trabalho['tempo_total_desejado'] > tempo_desejado:
+            falta = trabalho['tempo_total_desejado'] - tempo_desejado
+            print(f"\n=== 📼 Estimate was {falta}s short for {trabalho['arquivo']}, topping up ===")
+            trabalho['contador_videos'] = buscar_videos_federado(
+                query, falta, TEMPO_MAXIMO_POR_VIDEO, trabalho['contador_videos'],
+                usados=trabalho['usados'], diretorio=trabalho['espaco'].download_dir,
+            )
+    print(f"\n=== 📼 Video search completed! ===")
+    for host, estatisticas in obter_cliente_http().estatisticas().items():
+        print(f"🌐 {host}: {estatisticas['requisicoes']} requests, {estatisticas['reutilizacoes']} reused connections, avg latency {estatisticas['latencia_media']:.2f}s")
+    estatisticas = obter_cache_busca().estatisticas()
+    print(f"🔎 Search cache: {estatisticas['acertos']} hits, {estatisticas['acertos_stale']} stale hits, {estatisticas['falhas']} misses")
+    if media_cache():
+        estatisticas = media_cache().estatisticas()
+        print(f"♻️ Media cache: {estatisticas['acertos']} hits, {estatisticas['falhas']} misses, {estatisticas['bytes_economizados'] / 1_000_000:.1f} MB saved")
+    return trabalho
 
-        print(f"\n=== 📼 Generating base video ===")
-        videomaker = VideoMaker()
-        videomaker.criar_video("downloads", os.path.join("musics", "musica.mp3"), tempo_total_desejado=tempo_total_desejado)
-        print(f"\n=== 📼 Base video generated ===")
-        
-        print(f"\n=== 📼 Generating video with voice and text ===")
-        videomaker.adicionar_texto_e_audio(os.path.join("output", "final_video.mp4"), output_file=f"{arquivo}.mp4", script_file=roteiro_path)
-        print(f"\n=== 📼 Video with voice and text generated ===")
-        
-        print(f"\n=== 🟦 Authenticating YouTube ===")
-        youtube = YouTubeUploader()
-        youtube.authenticate()
-        print(f"\n=== ✅ YouTube authenticated ===")
+def etapa_render(trabalho, biblioteca_musical, renderizador):
+    arquivo = trabalho['arquivo']
+    # The music is picked here: the render process has no access to the library index
+    musica = os.path.join("musics", "musica.mp3")
+    if biblioteca_musical.quantidade():
+        musica = VideoMaker(biblioteca_musical=biblioteca_musical).escolher_musica(trabalho['tempo_total_desejado'], trabalho['documento'].musica)
+
+    print(f"\n=== 📼 Rendering {arquivo} ===")
+    renderizador.renderizar(trabalho['espaco'], trabalho['documento'], trabalho['tempo_total_desejado'],
+                            musica=musica, humor_musica=trabalho['documento'].musica)
+    print(f"\n=== 📼 Video with voice and text generated for {arquivo} ===")
+    return trabalho
+
+def etapa_publicar(trabalho):
+    arquivo = trabalho['arquivo']
+    documento = trabalho['documento']
+
+    print(f"\n=== 🟦 Authenticating YouTube ===")
+    youtube = YouTubeUploader(output_dir=trabalho['espaco'].saida_dir)
+    youtube.authenticate()
+    print(f"\n=== ✅ YouTube authenticated ===")
+    
+    print(f"\n=== ⏲️ Fetching last scheduled video on YouTube ===")
+    last_date = youtube.get_last_scheduled_video_date()
+    if last_date:
+        print("📅 The last scheduled video is set for:", last_date)
+        base_time = last_date + datetime.timedelta(seconds=1)
+    else:
+        print("📅 No scheduled videos found.")
+        base_time = None 
         
-        print(f"\n=== ⏲️ Fetching last scheduled video on YouTube ===")
-        last_date = youtube.get_last_scheduled_video_date()
-        if last_date:
-            print("📅 The last scheduled video is set for:", last_date)
-            base_time = last_date + datetime.timedelta(seconds=1)
-        else:
-            print("📅 No scheduled videos found.")
-            base_time = None 
-            
-        next_schedule = youtube.generate_schedule(1, start_time=base_time)[0]
+    next_schedule = youtube.generate_schedule(1, start_time=base_time)[0]
+    
+    titulo = documento.titulo
+    hashtags = documento.hashtags
+    video_path = trabalho['espaco'].video_final
+
+    print(f"\n=== ⬆️ Starting YouTube upload ===")
+    upload_success = youtube.upload_single_video(
+        video_path,
+        titulo,
+        hashtags,
+        scheduled_time=next_schedule  # Pass the calculated time
+    )
+    
+    if upload_success:
+        print("⬆️✅ Upload successful on YouTube!")
+    else:
+        print("⬆️🆘 Upload failed.")
         
-        titulo = find_value(roteiro_path, "TÍTULO:")
-        hashtags = find_value(roteiro_path, "HASHTAGS:")
-        video_path = os.path.join("output", f"{arquivo}.mp4")
-
-        print(f"\n=== ⬆️ Starting YouTube upload ===")
-        upload_success = youtube.upload_single_video(
-            video_path,
-            titulo,
-            hashtags,
-            scheduled_time=next_schedule  # Pass the calculated time
-        )
+    print(f"\n=== ⬆️ Starting TikTok upload ===")        
+    tiktok = TikTokUploader()
+    description_tiktok = f"{titulo.strip()}\n{hashtags.strip()}"
         
-        if upload_success:
-            print("⬆️✅ Upload successful on YouTube!")
-        else:
-            print("⬆️🆘 Upload failed.")
-            
-        print(f"\n=== ⬆️ Starting TikTok upload ===")        
-        tiktok = TikTokUploader()
-        description_tiktok = f"{titulo.strip()}\n{hashtags.strip()}"
-            
-        # next_schedule = datetime.datetime(2025, 2, 6, 18, 35)
-        print("\n🆚 TikTok description: ", description_tiktok)
-
-        sucesso_tiktok = tiktok.upload_video_to_tiktok(video_file=video_path, description=description_tiktok, scheduled_time=next_schedule)
-        if sucesso_tiktok:
-            print("⬆️✅ Upload scheduled successfully on TikTok!")
-        else:
-            print("⬆️🆘 Upload failed.")
-            
-        SCRIPT_BACKUP_PATH = "script_backup"
-        os.makedirs(SCRIPT_BACKUP_PATH, exist_ok=True)
-        shutil.move(roteiro_path, os.path.join(SCRIPT_BACKUP_PATH, arquivo))
+    # next_schedule = datetime.datetime(2025, 2, 6, 18, 35)
+    print("\n🆚 TikTok description: ", description_tiktok)
+
+    sucesso_tiktok = tiktok.upload_video_to_tiktok(video_file=video_path, description=description_tiktok, scheduled_time=next_schedule)
+    if sucesso_tiktok:
+        print("⬆️✅ Upload scheduled successfully on TikTok!")
+    else:
+        print("⬆️🆘 Upload failed.")
         
-    # Move videos from output to output_backup
-    for arquivo in os.listdir("output"):
-        try:
-            video_path = os.path.join("output", arquivo)
-            shutil.move(video_path, os.path.join("output_backup", arquivo))
-        except Exception as e:
-            print(f"Error moving file {arquivo} to output_backup: {e}")
-            continue
-    
-def find_value(arquivo, termo):
-    with open(arquivo, 'r', encoding='utf-8') as f:
-        for linha in f:
-            if linha.startswith(termo):
-                return linha.split(termo, 1)[1].strip()
-    return None
-
-def pixabay(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0):
+    SCRIPT_BACKUP_PATH = "script_backup"
+    os.makedirs(SCRIPT_BACKUP_PATH, exist_ok=True)
+    shutil.move(trabalho['roteiro_path'], os.path.join(SCRIPT_BACKUP_PATH, arquivo))
+
+    # Keep the published video, drop the job's clips and audio
+    os.makedirs("output_backup", exist_ok=True)
+    shutil.move(video_path, os.path.join("output_backup", os.path.basename(video_path)))
+    if not KEEP_WORKSPACES:
+        trabalho['espaco'].remover()
+    return trabalho
+
+def pixabay(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0, diretorio=DOWNLOAD_DIR):
     pixabay = PixabayAPI(PIXABAY_API_KEY)
     
     # Search for images if necessary
@@ -167,49 +303,21 @@ def pixabay(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video,
             print(f"URL: {img['pageURL']}, Tags: {img['tags']}")
         
         # Create downloads folder if it doesn't exist
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        os.makedirs(diretorio, exist_ok=True)
             
         # Download images
         print("\nDownloading found images:")
         for i, img in enumerate(imagens):
             url = img['largeImageURL']  # Direct link to the image file
-            destino = os.path.join(DOWNLOAD_DIR, f"imagem_{i+1}.jpg")
+            destino = os.path.join(diretorio, f"imagem_{i+1}.jpg")
             pixabay.baixar_arquivo(url, destino)
 
     # Search for videos
-    videos = pixabay.buscar_videos(query, num=50)  # Search up to 50 videos to ensure enough time
+    candidatos = pixabay.buscar_candidatos(query, num=50)  # Search up to 50 videos to ensure enough time
     print("\nVideos Found on Pixabay:")
-    tempo_acumulado = 0
+    return baixar_candidatos(candidatos, {"pixabay": pixabay.baixar_arquivo}, tempo_total_desejado, tempo_maximo_por_video, contador_videos, diretorio=diretorio)
 
-    for vid in videos:
-        if tempo_acumulado >= tempo_total_desejado:
-            print("Desired total time reached for Pixabay.")
-            break  # Stop if we've reached the desired time
-        
-        duracao = vid['duration']
-        if duracao > 200:
-            continue  # Ignore very long videos
-        
-        if duracao > tempo_maximo_por_video:
-            duracao = tempo_maximo_por_video  # Limit the maximum time per video
-
-        tempo_acumulado += duracao
-        contador_videos += 1
-        print(f"URL: {vid['pageURL']}, Duration: {vid['duration']} seconds, Considered: {duracao} seconds")
-
-        # Create downloads folder if it doesn't exist
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-
-        # Download video
-        print("\nDownloading found video:")
-        url = vid['videos']['medium']['url']  # Direct link to the video file
-        destino = os.path.join(DOWNLOAD_DIR, f"video_{contador_videos}.mp4")
-        pixabay.baixar_arquivo(url, destino)
-        
-    return contador_videos
-
-
-def pexels(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0):
+def pexels(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0, diretorio=DOWNLOAD_DIR):
     pexels = PexelsAPI(PEXELS_API_KEY)
     
     # Search for images if necessary
@@ -220,46 +328,158 @@ def pexels(query, buscar_imagens, tempo_total_desejado, tempo_maximo_por_video,
             print(f"URL: {img['url']}, Photographer: {img['photographer']}")
         
         # Create downloads folder if it doesn't exist
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        os.makedirs(diretorio, exist_ok=True)
             
         # Download images
         print("\nDownloading found images:")
         for i, img in enumerate(imagens):
             url = img['src']['original']  # Direct link to the image file
-            destino = os.path.join(DOWNLOAD_DIR, f"imagem_{i+1}.jpg")
+            destino = os.path.join(diretorio, f"imagem_{i+1}.jpg")
             pexels.baixar_arquivo(url, destino)
 
     # Search for videos
-    videos = pexels.buscar_videos(query, num=50, orientation="portrait")  # Search up to 50 videos to ensure enough time
-    tempo_acumulado = 0
+    candidatos = pexels.buscar_candidatos(query, num=50, orientation="portrait")  # Search up to 50 videos to ensure enough time
+    return baixar_candidatos(candidatos, {"pexels": pexels.baixar_arquivo}, tempo_total_desejado, tempo_maximo_por_video, contador_videos, diretorio=diretorio)
 
-    for vid in videos:
-        if tempo_acumulado >= tempo_total_desejado:
-            print("Desired total time reached for Pexels.")
-            break  # Stop if we've reached the desired time
-        
-        duracao = vid['duration']
-        if duracao > 200:
-            continue  # Ignore very long videos
-        
-        if duracao > tempo_maximo_por_video:
-            duracao = tempo_maximo_por_video  # Limit the maximum time per video
+def buscar_videos_federado(query, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0, usados=None, diretorio=DOWNLOAD_DIR):
+    """Search every configured provider concurrently and download the best plan"""
+    provedores = {}
+    baixadores = {}
+    if PEXELS_API_KEY:
+        pexels = PexelsAPI(PEXELS_API_KEY)
+        provedores["pexels"] = lambda q: pexels.buscar_candidatos(q, num=50, orientation="portrait")
+        baixadores["pexels"] = pexels.baixar_arquivo
+    if PIXABAY_API_KEY:
+        pixabay = PixabayAPI(PIXABAY_API_KEY)
+        provedores["pixabay"] = lambda q: pixabay.buscar_candidatos(q, num=50)
+        baixadores["pixabay"] = pixabay.baixar_arquivo
+
+    candidatos = BuscaFederada(provedores).buscar(query, tempo_total_desejado, tempo_maximo_por_video, usados=usados or ())
+    return baixar_candidatos(candidatos, baixadores, tempo_total_desejado, tempo_maximo_por_video, contador_videos, usados, diretorio)
 
-        tempo_acumulado += duracao
+def baixar_candidatos(candidatos, baixadores, tempo_total_desejado, tempo_maximo_por_video, contador_videos=0, usados=None, diretorio=DOWNLOAD_DIR):
+    """
+    Pick renditions, plan the clip set and download it as `diretorio`/video_N.mp4 in selection order.
+    Candidates whose (provider, id) is in `usados` are skipped and the planned ones are added to it.
+    """
+    usados = set() if usados is None else usados
+    # Choose the set of clips that fills the desired time with the fewest bytes
+    seletor = RenditionSelector()
+    prontos = [aplicar_rendicao(candidato, seletor.selecionar(candidato['rendicoes'])) for candidato in candidatos
+               if (candidato['provedor'], candidato['id']) not in usados]
+    prontos = [candidato for candidato in prontos if candidato]
+    planejador = ClipPlanner(download_parcial=PARTIAL_INGEST)
+    plano = planejador.planejar(prontos, tempo_total_desejado, tempo_maximo_por_video)
+    restantes = [candidato for candidato in prontos if not any(candidato is item['candidato'] for item in plano)]
+    usados.update((item['candidato']['provedor'], item['candidato']['id']) for item in plano)
+
+    # Create downloads folder if it doesn't exist
+    os.makedirs(diretorio, exist_ok=True)
+
+    # File names are assigned in selection order before the downloads start
+    tarefas = []
+    for item in plano:
         contador_videos += 1
-        print(f"URL: {vid['url']}, Duration: {vid['duration']} seconds, Considered: {duracao} seconds")
+        destino = os.path.join(diretorio, f"video_{contador_videos}.mp4")
+        tarefas.append(tarefa_download(item, destino, baixadores, tempo_maximo_por_video))
 
-        # Create downloads folder if it doesn't exist
-        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    # Download all selected videos in parallel; broken files are quarantined by the validator and
+    # each good one is normalized to 1080x1920 in the background while the rest are still downloading
+    print("\nDownloading found videos:")
+    # One encoder pool for the whole process, sized against the render processes that share the cores
+    transcoder = TranscodeWorker(
+        os.path.join(diretorio, "normalizados"), executor=obter_executor_transcodificacao(RENDER_PROCESSES),
+    ) if PRE_TRANSCODE else None
+    gerenciador = GerenciadorDownloads(
+        cache=media_cache(),
+        validador=ValidadorMidia(QUARANTINE_DIR),
+        ao_concluir=(lambda tarefa: transcoder.enviar(tarefa['destino'], tarefa['duracao_usada'])) if transcoder else None,
+    )
+    for _ in range(MAX_REPLACEMENT_ROUNDS + 1):
+        resultados = gerenciador.baixar_todos(tarefas)
 
-        # Download video
-        print("\nDownloading found video:")
-        url = vid['video_files'][0]['link']  # Direct link to the video file
-        destino = os.path.join(DOWNLOAD_DIR, f"video_{contador_videos}.mp4")
-        pexels.baixar_arquivo(url, destino)
-        
+        # Refill each failed slot with the best remaining candidates for the same duration
+        reposicoes = []
+        for tarefa, sucesso in zip(tarefas, resultados):
+            if sucesso:
+                continue
+            plano_reposicao = planejador.planejar(restantes, tarefa['duracao_usada'], tempo_maximo_por_video)
+            for posicao, item in enumerate(plano_reposicao):
+                restantes = [candidato for candidato in restantes if candidato is not item['candidato']]
+                usados.add((item['candidato']['provedor'], item['candidato']['id']))
+                destino = tarefa['destino']
+                if posicao > 0:
+                    contador_videos += 1
+                    destino = os.path.join(diretorio, f"video_{contador_videos}.mp4")
+                print(f"Replacing {os.path.basename(tarefa['destino'])}:")
+                reposicoes.append(tarefa_download(item, destino, baixadores, tempo_maximo_por_video))
+        if not reposicoes:
+            break
+        tarefas = reposicoes
+
+    if transcoder:
+        print(f"🎞️ {transcoder.aguardar()} clips normalized")
     return contador_videos
 
+def tarefa_download(item, destino, baixadores, tempo_maximo_por_video):
+    """Download task for one planned clip"""
+    candidato = item['candidato']
+    print(f"URL: {candidato['url_pagina']}, Provider: {candidato['provedor']}, Duration: {candidato['duracao']} seconds, Considered: {item['duracao_usada']} seconds")
+    return {
+        "url": candidato['url'],
+        "destino": destino,
+        "duracao_usada": item['duracao_usada'],
+        "chave": chave_cache(candidato, tempo_maximo_por_video),
+        "funcao_download": funcao_download(baixadores[candidato['provedor']], tempo_maximo_por_video),
+    }
+
+def carregar_biblioteca_musical():
+    """Open the local music index and, if MUSIC_MOODS is set, keep filling it in the background"""
+    biblioteca = BibliotecaMusical(
+        jamendo=JamendoAPI(JAMENDO_CLIENT_ID) if JAMENDO_CLIENT_ID else None,
+        freesound=FreesoundAPI(FREESOUND_API_KEY) if FREESOUND_API_KEY else None,
+    )
+    if MUSIC_MOODS and (biblioteca.jamendo or biblioteca.freesound):
+        biblioteca.iniciar_ingestao(MUSIC_MOODS)
+    return biblioteca
+
+_media_cache = None
+_media_cache_lock = threading.Lock()  # Several ingest workers may ask for it at once
+
+def media_cache():
+    """Shared stock media cache, or None when disabled"""
+    global _media_cache
+    with _media_cache_lock:
+        if USE_MEDIA_CACHE and _media_cache is None:
+            _media_cache = MediaCache()
+    return _media_cache
+
+def funcao_download(baixar_arquivo, tempo_maximo_por_video):
+    """Fetch only the leading seconds that will be used when partial ingest is enabled"""
+    if PARTIAL_INGEST:
+        return BaixadorParcial(tempo_maximo_por_video, download_completo=baixar_arquivo).baixar
+    return baixar_arquivo
+
+def chave_cache(candidato, tempo_maximo_por_video):
+    rendicao = candidato['rendicao']
+    if PARTIAL_INGEST:
+        rendicao = f"{rendicao}@{tempo_maximo_por_video}s"  # Partial files are cached apart from full ones
+    return (candidato['provedor'], candidato['id'], rendicao)
+
+def aplicar_rendicao(candidato, rendicao):
+    """Planner candidate with the chosen rendition's size and URL, or None if there is none"""
+    if rendicao is None:
+        return None
+    return dict(
+        candidato,
+        largura=rendicao['largura'],
+        altura=rendicao['altura'],
+        tamanho=rendicao.get('tamanho'),
+        fps=rendicao.get('fps'),
+        rendicao=rendicao['nome'],
+        url=rendicao['url'],
+    )
+
 if __name__ == "__main__":
     main()
     
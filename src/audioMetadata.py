@@ -0,0 +1,123 @@
+import os
+import struct
+import threading
+
+_duracoes = {}
+_lock = threading.Lock()
+
+def duracao_audio(caminho):
+    """
+    Duração (segundos) de um arquivo de áudio sem decodificá-lo.
+
+    WAV (como o LINEAR16 do Google TTS) é lido só pelo cabeçalho RIFF e Ogg Opus
+    pela posição da última página; outros formatos caem no pydub. O resultado é memorizado por (caminho, mtime, tamanho),
+    então o mesmo arquivo nunca é medido duas vezes e um arquivo regravado é medido de novo.
+    """
+    estado = os.stat(caminho)
+    chave = (os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size)
+    with _lock:
+        if chave in _duracoes:
+            return _duracoes[chave]
+
+    with open(caminho, "rb") as arquivo:
+        inicio = arquivo.read(64 * 1024)
+        duracao = duracao_wav(inicio, estado.st_size)
+        if duracao is None and inicio[:4] == b"OggS":
+            arquivo.seek(max(0, estado.st_size - 64 * 1024))
+            duracao = duracao_ogg(inicio, arquivo.read())
+    if duracao is None:
+        from pydub import AudioSegment
+        duracao = len(AudioSegment.from_file(caminho)) / 1000
+
+    with _lock:
+        _duracoes[chave] = duracao
+    return duracao
+
+def registrar_duracao(caminho, duracao):
+    """Memoriza a duração de um arquivo recém-gravado (ex.: calculada a partir da resposta da API)"""
+    estado = os.stat(caminho)
+    with _lock:
+        _duracoes[(os.path.abspath(caminho), estado.st_mtime_ns, estado.st_size)] = duracao
+
+def duracao_bytes(dados):
+    """Duração de um áudio WAV ou Ogg Opus inteiro em memória (ex.: a resposta do TTS), ou None"""
+    duracao = duracao_wav(dados)
+    if duracao is None and dados[:4] == b"OggS":
+        duracao = duracao_ogg(dados, dados[-64 * 1024:])
+    return duracao
+
+def duracao_ogg(inicio, fim):
+    """
+    Duração de um Ogg Opus pelo granule position da última página menos o pre-skip
+    do cabeçalho OpusHead (o Opus sempre conta amostras a 48 kHz), ou None.
+
+    :param inicio: Bytes iniciais do arquivo (com a página do OpusHead).
+    :param fim: Bytes finais do arquivo (com a última página).
+    """
+    cabecalho = inicio.find(b"OpusHead")
+    if cabecalho < 0 or cabecalho + 12 > len(inicio):
+        return None
+    granule = _granule_final(fim)
+    if granule is None:
+        return None
+    pre_skip = struct.unpack("<H", inicio[cabecalho + 10:cabecalho + 12])[0]
+    return max(0, granule - pre_skip) / 48000
+
+def _granule_final(fim):
+    """
+    Granule position da última página de `fim` (o final de um Ogg), ou None.
+
+    "OggS" também pode aparecer dentro de um pacote Opus, então não basta
+    procurar a última ocorrência: a partir de cada ocorrência candidata, as
+    páginas são percorridas pelo cabeçalho (padrão de captura, versão 0, 27
+    bytes mais a tabela de segmentos e o corpo) e só vale a cadeia que termina
+    exatamente no fim dos dados.
+    """
+    candidata = fim.find(b"OggS")
+    while candidata >= 0:
+        posicao, granule = candidata, None
+        while posicao + 27 <= len(fim) and fim[posicao:posicao + 4] == b"OggS" and fim[posicao + 4] == 0:
+            segmentos = fim[posicao + 26]
+            corpo = posicao + 27 + segmentos
+            if corpo > len(fim):
+                break
+            proxima = corpo + sum(fim[posicao + 27:corpo])
+            if proxima > len(fim):
+                break
+            valor = struct.unpack("<q", fim[posicao + 6:posicao + 14])[0]
+            if valor >= 0:  # -1: nenhum pacote termina nesta página
+                granule = valor
+            posicao = proxima
+        if posicao == len(fim) and posicao > candidata:
+            return granule
+        candidata = fim.find(b"OggS", candidata + 1)
+    return None
+
+def duracao_wav(dados, tamanho_total=None):
+    """
+    Duração de um WAV a partir dos seus bytes iniciais (cabeçalho RIFF), ou None se não for WAV PCM.
+
+    :param dados: O conteúdo do arquivo, ou ao menos o começo dele até o chunk "data".
+    :param tamanho_total: Tamanho do arquivo inteiro, quando `dados` é só o começo.
+    """
+    if len(dados) < 12 or dados[:4] != b"RIFF" or dados[8:12] != b"WAVE":
+        return None
+    tamanho_total = tamanho_total or len(dados)
+    bytes_por_segundo = None
+    posicao = 12
+    while posicao + 8 <= len(dados):
+        nome, tamanho = struct.unpack("<4sI", dados[posicao:posicao + 8])
+        inicio = posicao + 8
+        if nome == b"fmt " and inicio + 16 <= len(dados):
+            _, canais, taxa, _, alinhamento, _ = struct.unpack("<HHIIHH", dados[inicio:inicio + 16])
+            bytes_por_segundo = taxa * alinhamento if alinhamento else None
+        elif nome == b"data":
+            if not bytes_por_segundo:
+                return None
+            # Respostas em streaming às vezes deixam o tamanho do chunk zerado ou no máximo
+            disponivel = tamanho_total - inicio
+            if tamanho == 0 or tamanho == 0xFFFFFFFF or tamanho > disponivel:
+                tamanho = disponivel
+            return tamanho / bytes_por_segundo
+        posicao = inicio + tamanho + (tamanho & 1)
+    return None
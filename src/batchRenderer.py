@@ -0,0 +1,48 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from src.videomaker import VideoMaker
+
+load_dotenv()
+
+# Renders simultâneos; cada um ocupa um processo (o moviepy compõe os quadros em Python)
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES") or max(1, (os.cpu_count() or 1) // 8))
+
+class RenderizadorLote:
+    """
+    Renderiza vários roteiros ao mesmo tempo, um processo por vídeo.
+
+    A composição dos quadros no moviepy é Python puro e presa ao GIL, então
+    threads não escalam; cada render roda em um processo do pool e o ffmpeg de
+    cada um recebe uma fatia dos núcleos. `renderizar` bloqueia até o vídeo
+    ficar pronto, então pode ser chamado por vários workers do pipeline.
+    """
+
+    def __init__(self, max_processos=RENDER_PROCESSES):
+        """
+        :param max_processos: Quantos vídeos podem estar em render ao mesmo tempo.
+        """
+        self.max_processos = max(1, max_processos)
+        self.threads_ffmpeg = max(1, (os.cpu_count() or 1) // self.max_processos)
+        # spawn, não fork: o pool nasce de uma thread do pipeline com downloads, TTS e a ingestão de
+        # músicas rodando, e um filho criado por fork herdaria locks (stdout, sqlite, caches) já travados
+        self._executor = ProcessPoolExecutor(max_workers=self.max_processos, mp_context=multiprocessing.get_context("spawn"))
+
+    def renderizar(self, espaco, documento, tempo_total_desejado, musica=None, humor_musica=None):
+        """Gera espaco.video_final a partir dos clipes e áudios do espaço de trabalho e retorna o caminho"""
+        return self._executor.submit(renderizar, espaco, documento, tempo_total_desejado,
+                                     musica, humor_musica, self.threads_ffmpeg).result()
+
+    def fechar(self):
+        self._executor.shutdown(wait=True)
+
+def renderizar(espaco, documento, tempo_total_desejado, musica=None, humor_musica=None, threads=None):
+    """Render completo de um job (vídeo base e depois texto e narração), executado no processo do pool"""
+    videomaker = VideoMaker(audio_dir=espaco.audio_dir, output_dir=espaco.saida_dir, threads=threads)
+    videomaker.criar_video(espaco.download_dir, musica, output_file=os.path.basename(espaco.video_base),
+                           tempo_total_desejado=tempo_total_desejado, humor_musica=humor_musica)
+    videomaker.adicionar_texto_e_audio(espaco.video_base, output_file=os.path.basename(espaco.video_final), script_file=documento)
+    if not os.path.exists(espaco.video_final):
+        raise RuntimeError(f"O render de {espaco.nome} não gerou {espaco.video_final}")
+    return espaco.video_final
@@ -0,0 +1,122 @@
+class ClipPlanner:
+    """
+    Planeja quais clipes baixar para preencher a duração da narração.
+
+    Cada candidato é um dicionário com os metadados do clipe e da versão escolhida:
+      - id, provedor, url
+      - duracao (segundos), largura, altura
+      - tamanho (bytes, opcional; estimado a partir da resolução se ausente)
+
+    O planejamento é uma mochila de cobertura resolvida por programação dinâmica
+    em segundos inteiros: escolhe o conjunto que cobre o tempo desejado com o
+    menor custo, onde o custo soma os bytes baixados, uma penalidade por
+    upscaling e um custo fixo por download (para preferir menos arquivos).
+    Com download parcial, só os segundos usados de cada clipe contam como bytes.
+    """
+
+    BITS_POR_PIXEL = 0.1  # Estimativa de bitrate de um H.264 de stock (bits por pixel por quadro)
+    FPS_PADRAO = 30
+
+    def __init__(self, largura_tela=1080, altura_tela=1920, custo_por_download=2_000_000, peso_upscale=4.0, download_parcial=False):
+        """
+        :param largura_tela: Largura do vídeo final.
+        :param altura_tela: Altura do vídeo final.
+        :param custo_por_download: Custo fixo (em bytes equivalentes) de cada download.
+        :param peso_upscale: Multiplicador da penalidade quando o clipe precisa ser ampliado.
+        :param download_parcial: Se apenas o trecho usado de cada clipe será baixado (BaixadorParcial).
+        """
+        self.largura_tela = largura_tela
+        self.altura_tela = altura_tela
+        self.custo_por_download = custo_por_download
+        self.peso_upscale = peso_upscale
+        self.download_parcial = download_parcial
+
+    def estimar_bytes(self, candidato, tempo_maximo_por_video=None):
+        """Retorna o tamanho informado pelo provedor ou uma estimativa pela resolução e duração"""
+        if candidato.get("tamanho"):
+            total = candidato["tamanho"]
+        else:
+            fps = candidato.get("fps") or self.FPS_PADRAO
+            pixels = (candidato.get("largura") or self.largura_tela) * (candidato.get("altura") or self.altura_tela)
+            total = pixels * fps * self.BITS_POR_PIXEL / 8 * candidato["duracao"]
+
+        if self.download_parcial and tempo_maximo_por_video and candidato["duracao"] > tempo_maximo_por_video:
+            total *= tempo_maximo_por_video / candidato["duracao"]
+        return int(total)
+
+    def fator_upscale(self, candidato):
+        """Quanto o clipe precisa ser ampliado para cobrir a tela após o crop (1.0 = sem ampliação)"""
+        largura = candidato.get("largura")
+        altura = candidato.get("altura")
+        if not largura or not altura:
+            return 1.0
+        return max(1.0, self.largura_tela / largura, self.altura_tela / altura)
+
+    def custo(self, candidato, tempo_maximo_por_video=None):
+        penalidade = (self.fator_upscale(candidato) - 1.0) * self.peso_upscale
+        return self.estimar_bytes(candidato, tempo_maximo_por_video) * (1.0 + penalidade) + self.custo_por_download
+
+    def planejar(self, candidatos, tempo_total_desejado, tempo_maximo_por_video=10, duracao_maxima=200):
+        """
+        Escolhe os clipes e os pontos de corte.
+
+        Retorna uma lista de dicionários {"candidato", "duracao_usada"} na ordem em que
+        devem ser baixados/montados. Apenas o último item pode ser cortado antes de
+        tempo_maximo_por_video, exatamente como o criar_video faz.
+        """
+        alvo = int(tempo_total_desejado)
+        utilizaveis = []
+        for indice, candidato in enumerate(candidatos):
+            duracao = candidato.get("duracao") or 0
+            if duracao > duracao_maxima:
+                continue  # Ignora vídeos muito longos
+            contribuicao = int(min(duracao, tempo_maximo_por_video))
+            if contribuicao <= 0:
+                continue
+            utilizaveis.append((indice, candidato, contribuicao, self.custo(candidato, tempo_maximo_por_video)))
+
+        if alvo <= 0 or not utilizaveis:
+            return []
+
+        # Sem cobertura possível: usa tudo o que houver
+        if sum(c for _, _, c, _ in utilizaveis) < alvo:
+            escolhidos = utilizaveis
+        else:
+            escolhidos = self._resolver(utilizaveis, alvo)
+
+        escolhidos = sorted(escolhidos, key=lambda item: item[0])
+        excesso = sum(c for _, _, c, _ in escolhidos) - alvo
+
+        # O clipe cortado vai para o final, pois o criar_video trunca apenas o último
+        if excesso > 0:
+            cortado = max(escolhidos, key=lambda item: item[2])
+            escolhidos.remove(cortado)
+            escolhidos.append(cortado)
+
+        plano = []
+        for posicao, (_, candidato, contribuicao, _) in enumerate(escolhidos):
+            duracao_usada = contribuicao
+            if excesso > 0 and posicao == len(escolhidos) - 1:
+                duracao_usada = contribuicao - excesso
+            plano.append({"candidato": candidato, "duracao_usada": duracao_usada})
+        return plano
+
+    @staticmethod
+    def _resolver(utilizaveis, alvo):
+        """Mochila 0/1 de cobertura: custo mínimo para atingir pelo menos `alvo` segundos"""
+        infinito = float("inf")
+        custos = [infinito] * (alvo + 1)
+        escolhas = [()] * (alvo + 1)
+        custos[0] = 0.0
+
+        for posicao, (_, _, contribuicao, custo) in enumerate(utilizaveis):
+            for tempo in range(alvo, -1, -1):
+                if custos[tempo] == infinito:
+                    continue
+                novo_tempo = min(alvo, tempo + contribuicao)
+                novo_custo = custos[tempo] + custo
+                if novo_custo < custos[novo_tempo]:
+                    custos[novo_tempo] = novo_custo
+                    escolhas[novo_tempo] = escolhas[tempo] + (posicao,)
+
+        return [utilizaveis[posicao] for posicao in escolhas[alvo]]
@@ -0,0 +1,151 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+DOWNLOAD_PER_HOST = int(os.getenv("DOWNLOAD_PER_HOST", "4"))
+
+class GerenciadorDownloads:
+    """
+    Baixa vários arquivos em paralelo com limite de concorrência global e por host.
+
+    Cada tarefa é um dicionário com "url" e "destino". Os destinos são definidos
+    por quem chama (ex.: video_N.mp4 na ordem da seleção), então o resultado é
+    determinístico independentemente da ordem em que os downloads terminam.
+    Se a tarefa tiver "chave" = (provedor, id, rendição) e houver um MediaCache,
+    o arquivo é servido/guardado pelo cache. Uma tarefa pode trazer a própria
+    "funcao_download" (ex.: quando mistura vídeos de provedores diferentes).
+    Com um ValidadorMidia, cada arquivo é conferido ao terminar; os inválidos
+    vão para a quarentena, saem do cache e a tarefa conta como falha.
+    `ao_concluir(tarefa)` é chamado logo que cada arquivo fica pronto, ainda com
+    os outros downloads em andamento (ex.: para começar a transcodificação).
+    """
+
+    def __init__(self, max_workers=DOWNLOAD_WORKERS, limite_por_host=DOWNLOAD_PER_HOST, intervalo_progresso=1.0, cache=None,
+                 validador=None, ao_concluir=None):
+        """
+        :param max_workers: Downloads simultâneos no total.
+        :param limite_por_host: Downloads simultâneos para um mesmo host, somando todos os gerenciadores do processo.
+        :param intervalo_progresso: Intervalo mínimo (segundos) entre as mensagens de progresso.
+        :param cache: MediaCache opcional consultado antes de cada download.
+        :param validador: ValidadorMidia opcional aplicado a cada arquivo baixado.
+        :param ao_concluir: Função opcional chamada com cada tarefa concluída com sucesso.
+        """
+        self.cache = cache
+        self.validador = validador
+        self.ao_concluir = ao_concluir
+        self.max_workers = max_workers
+        self.limite_por_host = limite_por_host
+        self.intervalo_progresso = intervalo_progresso
+
+    def baixar_todos(self, tarefas, funcao_download=None):
+        """
+        Executa `funcao_download(url, destino, progresso=callback)` para cada tarefa.
+
+        Retorna a lista de resultados (True/False) na mesma ordem das tarefas.
+        """
+        if not tarefas:
+            return []
+
+        progresso = _Progresso(len(tarefas), self.intervalo_progresso)
+        inicio = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tarefas))) as executor:
+            futuros = [executor.submit(self._executar, tarefa, funcao_download, progresso) for tarefa in tarefas]
+            resultados = [futuro.result() for futuro in futuros]
+
+        duracao = time.monotonic() - inicio
+        print(f"⬇️ {sum(resultados)}/{len(tarefas)} downloads concluídos: "
+              f"{progresso.bytes_baixados / 1_000_000:.1f} MB em {duracao:.1f}s")
+        return resultados
+
+    def _executar(self, tarefa, funcao_download, progresso):
+        funcao_download = tarefa.get("funcao_download", funcao_download)
+        chave = tarefa.get("chave")
+        if self.cache and chave and self.cache.obter(*chave, tarefa["destino"]):
+            sucesso = self._validar(tarefa)
+            progresso.concluir()
+            return self._concluir(tarefa, sucesso)
+
+        with semaforo_host(urlsplit(tarefa["url"]).netloc, self.limite_por_host):
+            try:
+                if self.cache and chave:
+                    sucesso = self.cache.baixar(*chave, tarefa["url"], tarefa["destino"], funcao_download,
+                                                progresso=progresso.adicionar_bytes)
+                else:
+                    sucesso = bool(funcao_download(tarefa["url"], tarefa["destino"], progresso=progresso.adicionar_bytes))
+            except Exception as e:
+                print(f"Erro durante o download de {tarefa['destino']}: {e}")
+                sucesso = False
+
+        if sucesso:
+            sucesso = self._validar(tarefa)
+        progresso.concluir()
+        return self._concluir(tarefa, sucesso)
+
+    def _concluir(self, tarefa, sucesso):
+        if sucesso and self.ao_concluir:
+            try:
+                self.ao_concluir(tarefa)
+            except Exception as e:
+                print(f"Erro ao processar {tarefa['destino']}: {e}")
+        return sucesso
+
+    def _validar(self, tarefa):
+        if self.validador is None:
+            return True
+        valido, motivo = self.validador.validar(tarefa["destino"])
+        if valido:
+            return True
+        self.validador.quarentenar(tarefa["destino"], motivo)
+        if self.cache and tarefa.get("chave"):
+            self.cache.remover(*tarefa["chave"])
+        return False
+
+class _Progresso:
+    """Progresso agregado de uma chamada de baixar_todos"""
+
+    def __init__(self, total, intervalo):
+        self.total = total
+        self.intervalo = intervalo
+        self.bytes_baixados = 0
+        self.concluidos = 0
+        self._ultimo = 0.0
+        self._lock = threading.Lock()
+
+    def adicionar_bytes(self, num_bytes):
+        with self._lock:
+            self.bytes_baixados += num_bytes
+        self._exibir()
+
+    def concluir(self):
+        with self._lock:
+            self.concluidos += 1
+        self._exibir(forcar=True)
+
+    def _exibir(self, forcar=False):
+        with self._lock:
+            agora = time.monotonic()
+            if not forcar and agora - self._ultimo < self.intervalo:
+                return
+            self._ultimo = agora
+            mensagem = f"⬇️ Progresso: {self.concluidos}/{self.total} arquivos, {self.bytes_baixados / 1_000_000:.1f} MB"
+        print(mensagem)
+
+_semaforos_host = {}
+_semaforos_lock = threading.Lock()
+
+def semaforo_host(host, limite=DOWNLOAD_PER_HOST):
+    """
+    Retorna o semáforo do host compartilhado pelo processo: vários gerenciadores
+    (um por worker de ingestão) somados não passam de `limite` downloads no host.
+    """
+    with _semaforos_lock:
+        if (host, limite) not in _semaforos_host:
+            _semaforos_host[host, limite] = threading.BoundedSemaphore(limite)
+        return _semaforos_host[host, limite]
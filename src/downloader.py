@@ -0,0 +1,106 @@
+import os
+import time
+import requests
+from src.httpClient import obter_cliente_http
+
+class Downloader:
+    """
+    Download de arquivos grandes com retomada e escrita atômica.
+
+    O conteúdo é gravado em `<destino>.part` com buffers grandes. Se a conexão cair,
+    a próxima tentativa continua de onde parou usando um cabeçalho Range. O tamanho
+    final é conferido com o Content-Length e só então o arquivo é renomeado para o
+    destino, de modo que um download interrompido nunca deixa um arquivo truncado
+    no lugar do final.
+    """
+
+    TAMANHO_BUFFER = 1024 * 1024  # 1 MB por leitura
+
+    def __init__(self, cliente_http=None, tentativas=3, espera=2.0):
+        """
+        :param cliente_http: ClienteHTTP usado nas requisições (padrão: o compartilhado).
+        :param tentativas: Quantas vezes retomar um download interrompido.
+        :param espera: Espera base (segundos) entre as retomadas.
+        """
+        self.http = cliente_http or obter_cliente_http()
+        self.tentativas = tentativas
+        self.espera = espera
+
+    def baixar(self, url, destino, headers=None, progresso=None):
+        """Baixa `url` para `destino`. Retorna True em caso de sucesso."""
+        parcial = destino + ".part"
+
+        for tentativa in range(self.tentativas + 1):
+            try:
+                concluido = self._baixar_parcial(url, parcial, headers or {}, progresso)
+            except (requests.RequestException, OSError) as e:
+                print(f"Download interrompido ({e}), tentativa {tentativa + 1}/{self.tentativas + 1}: {url}")
+                concluido = None
+
+            if concluido:
+                os.replace(parcial, destino)
+                print(f"Arquivo baixado: {destino}")
+                return True
+            if concluido is False:
+                break  # Erro definitivo (ex.: 404), não adianta tentar de novo
+            time.sleep(self.espera * (2 ** tentativa))
+
+        print(f"Erro ao baixar arquivo: {url}")
+        return False
+
+    def _baixar_parcial(self, url, parcial, headers, progresso):
+        """
+        Faz uma tentativa de download, continuando o `.part` se ele existir.
+
+        Retorna True se o arquivo ficou completo, None se deve ser retomado e
+        False se o servidor respondeu com um erro definitivo.
+        """
+        inicio = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+        headers = dict(headers)
+        if inicio:
+            headers["Range"] = f"bytes={inicio}-"
+
+        with self.http.get(url, headers=headers, stream=True) as resposta:
+            if resposta.status_code == 416:
+                # O .part não corresponde mais ao arquivo remoto: recomeça do zero
+                os.remove(parcial)
+                return None
+            if resposta.status_code == 206:
+                modo = "ab"
+                total = self._tamanho_total(resposta)
+            elif resposta.status_code == 200:
+                modo = "wb"  # Servidor ignorou o Range (ou é o primeiro pedaço)
+                inicio = 0
+                total = self._tamanho_conteudo(resposta)
+            else:
+                print(f"Erro ao baixar arquivo: {url} (HTTP {resposta.status_code})")
+                return False
+
+            with open(parcial, modo) as arquivo:
+                for chunk in resposta.iter_content(self.TAMANHO_BUFFER):
+                    arquivo.write(chunk)
+                    if progresso:
+                        progresso(len(chunk))
+
+        tamanho = os.path.getsize(parcial)
+        if total is None or tamanho == total:
+            return True
+        if tamanho > total:
+            print(f"Tamanho inesperado ({tamanho} > {total} bytes), recomeçando: {url}")
+            os.remove(parcial)
+        return None
+
+    @staticmethod
+    def _tamanho_conteudo(resposta):
+        # Com Content-Encoding o Content-Length refere-se aos bytes comprimidos
+        if resposta.headers.get("Content-Encoding") not in (None, "identity"):
+            return None
+        valor = resposta.headers.get("Content-Length")
+        return int(valor) if valor and valor.isdigit() else None
+
+    @staticmethod
+    def _tamanho_total(resposta):
+        # Content-Range: bytes 100-199/200
+        valor = resposta.headers.get("Content-Range", "")
+        total = valor.rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
@@ -0,0 +1,104 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from contextlib import closing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DURATION_ESTIMATOR_DB = os.getenv("DURATION_ESTIMATOR_DB", os.path.join("cache", "duracoes.sqlite"))
+
+PAUSAS = re.compile(r"[.,;:!?…—]")
+LETRAS = re.compile(r"\w")
+
+class EstimadorDuracao:
+    """
+    Estima a duração da narração a partir do texto, antes de sintetizá-la.
+
+    Cada parte vira (letras, palavras, pausas de pontuação, 1) e a duração é
+    uma combinação linear disso dividida pela velocidade da voz. Os pesos são
+    calibrados por mínimos quadrados com as durações reais já geradas pelo TTS
+    (guardadas em SQLite por backend e voz), puxados para os valores padrão
+    quando há poucas amostras, então a estimativa melhora a cada roteiro.
+    """
+
+    # Segundos por letra, por palavra, por pausa e por parte (silêncio no início/fim do áudio)
+    PESOS_PADRAO = np.array([0.062, 0.02, 0.3, 0.15])
+
+    def __init__(self, indice=DURATION_ESTIMATOR_DB, regularizacao=5.0, max_amostras=2000):
+        """
+        :param indice: Banco SQLite com as durações reais.
+        :param regularizacao: Peso dos valores padrão na calibração (equivale a esse número de amostras).
+        :param max_amostras: Quantas amostras mais recentes de cada perfil entram na calibração.
+        """
+        self.indice = indice
+        self.regularizacao = regularizacao
+        self.max_amostras = max_amostras
+        self._pesos = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(indice) or ".", exist_ok=True)
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS amostras ("
+                " chave TEXT PRIMARY KEY, perfil TEXT, letras INTEGER, palavras INTEGER, pausas INTEGER,"
+                " duracao REAL, registrado REAL)"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS amostras_perfil ON amostras (perfil, registrado)")
+
+    @staticmethod
+    def caracteristicas(texto):
+        """(letras, palavras, pausas, 1) de uma parte da narração"""
+        return (len(LETRAS.findall(texto)), len(texto.split()), len(PAUSAS.findall(texto)), 1)
+
+    def estimar(self, textos, perfil, velocidade=1.0):
+        """Duração total estimada (segundos) das partes `textos` no perfil (backend e voz) informado"""
+        if not textos:
+            return 0.0
+        pesos = self.pesos(perfil)
+        matriz = np.array([self.caracteristicas(texto) for texto in textos], dtype=float)
+        return float(np.clip(matriz @ pesos, 0, None).sum()) / velocidade
+
+    def registrar(self, amostras, perfil, velocidade=1.0):
+        """Guarda as durações reais [(texto, duracao)] para as próximas calibrações"""
+        agora = time.time()
+        linhas = []
+        for texto, duracao in amostras:
+            if not texto or not duracao:
+                continue
+            chave = hashlib.sha256(f"{perfil}\n{texto}".encode("utf-8")).hexdigest()
+            letras, palavras, pausas, _ = self.caracteristicas(texto)
+            # Guardada na velocidade 1.0, para misturar amostras de velocidades diferentes
+            linhas.append((chave, perfil, letras, palavras, pausas, duracao * velocidade, agora))
+        if not linhas:
+            return
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.executemany("INSERT OR REPLACE INTO amostras VALUES (?, ?, ?, ?, ?, ?, ?)", linhas)
+        with self._lock:
+            self._pesos.pop(perfil, None)
+
+    def pesos(self, perfil):
+        """Pesos calibrados do perfil: mínimos quadrados com regularização em direção aos padrões"""
+        with self._lock:
+            if perfil in self._pesos:
+                return self._pesos[perfil]
+        with closing(self._conectar()) as conexao:
+            linhas = conexao.execute(
+                "SELECT letras, palavras, pausas, duracao FROM amostras WHERE perfil = ? ORDER BY registrado DESC LIMIT ?",
+                (perfil, self.max_amostras),
+            ).fetchall()
+        pesos = self.PESOS_PADRAO
+        if linhas:
+            dados = np.array(linhas, dtype=float)
+            matriz = np.column_stack([dados[:, :3], np.ones(len(dados))])
+            regularizacao = self.regularizacao * np.eye(len(pesos))
+            pesos = np.linalg.solve(matriz.T @ matriz + regularizacao, matriz.T @ dados[:, 3] + regularizacao @ self.PESOS_PADRAO)
+        with self._lock:
+            self._pesos[perfil] = pesos
+        return pesos
+
+    def _conectar(self):
+        return sqlite3.connect(self.indice, timeout=30)
@@ -0,0 +1,94 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FEDERATED_SEARCH_TIMEOUT = float(os.getenv("FEDERATED_SEARCH_TIMEOUT", "20"))
+
+class BuscaFederada:
+    """
+    Busca vídeos em vários provedores ao mesmo tempo.
+
+    Cada provedor é uma função `buscar(query)` que devolve candidatos já
+    normalizados ({"id", "provedor", "duracao", "rendicoes", "orientacao",
+    "autor", "url_pagina"}), como `PexelsAPI.buscar_candidatos`. Os resultados são
+    unidos na ordem em que os provedores respondem, sem duplicatas, e a busca
+    retorna assim que houver duração suficiente, sem esperar os provedores
+    lentos (ou com erro). Vídeos já usados pelo roteiro não contam para essa
+    duração, nem são devolvidos.
+    """
+
+    def __init__(self, provedores, margem=1.5, timeout=FEDERATED_SEARCH_TIMEOUT):
+        """
+        :param provedores: Dicionário {nome: funcao_busca(query)}.
+        :param margem: Quanto de duração utilizável juntar além do necessário, para dar opções ao planejador.
+        :param timeout: Tempo máximo (segundos) de espera pelos provedores.
+        """
+        self.provedores = provedores
+        self.margem = margem
+        self.timeout = timeout
+
+    def buscar(self, query, tempo_total_desejado, tempo_maximo_por_video=10, duracao_maxima=200, usados=()):
+        """
+        Retorna a lista de candidatos de todos os provedores que responderam a tempo.
+
+        :param usados: (provedor, id) dos vídeos já planejados, ex.: nas complementações e reposições.
+        """
+        if not self.provedores:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=len(self.provedores))
+        futuros = {executor.submit(buscar, query): nome for nome, buscar in self.provedores.items()}
+        candidatos = []
+        ids_vistos = set(usados)
+        impressoes = {}
+        tempo_disponivel = 0
+
+        try:
+            for futuro in as_completed(futuros, timeout=self.timeout):
+                nome = futuros[futuro]
+                try:
+                    resultados = futuro.result()
+                except Exception as e:
+                    print(f"Erro na busca em {nome}: {e}")
+                    continue
+
+                novos = 0
+                for candidato in resultados:
+                    identificador = (candidato["provedor"], candidato["id"])
+                    impressao = self._impressao(candidato)
+                    if identificador in ids_vistos:
+                        continue
+                    if impressao is not None and impressoes.get(impressao, candidato["provedor"]) != candidato["provedor"]:
+                        continue  # Mesmo vídeo já encontrado em outro provedor
+                    ids_vistos.add(identificador)
+                    if impressao is not None:
+                        impressoes.setdefault(impressao, candidato["provedor"])
+                    candidatos.append(candidato)
+                    novos += 1
+                    if candidato["duracao"] <= duracao_maxima:
+                        tempo_disponivel += min(candidato["duracao"], tempo_maximo_por_video)
+                print(f"🔎 {nome}: {novos} vídeos novos ({tempo_disponivel}s utilizáveis no total)")
+
+                if tempo_disponivel >= tempo_total_desejado * self.margem:
+                    break
+        except TimeoutError:
+            print(f"Busca federada: tempo esgotado, usando os {len(candidatos)} vídeos já encontrados.")
+        finally:
+            # Não espera provedores lentos: seus resultados ainda vão para o cache de buscas
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return candidatos
+
+    @staticmethod
+    def _impressao(candidato):
+        """
+        Autor, duração e maior resolução do vídeo. Só é usada entre provedores
+        diferentes, para pegar o mesmo vídeo publicado pelo mesmo autor no Pexels e no Pixabay.
+        """
+        autor = "".join((candidato.get("autor") or "").lower().split())
+        dimensoes = [(r["largura"], r["altura"]) for r in candidato["rendicoes"] if r.get("largura") and r.get("altura")]
+        if not autor or not dimensoes:
+            return None
+        return autor, candidato["duracao"], max(dimensoes, key=lambda d: d[0] * d[1])
@@ -0,0 +1,30 @@
+import os
+import subprocess
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def caminho_ffmpeg():
+    """Executável do ffmpeg: FFMPEG_BINARY, o binário do imageio-ffmpeg (usado pelo moviepy) ou o do PATH"""
+    binario = os.getenv("FFMPEG_BINARY")
+    if binario:
+        return binario
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+def executar_ffmpeg(argumentos, timeout=None):
+    """
+    Executa o ffmpeg com os argumentos informados.
+
+    Retorna (sucesso, mensagem_de_erro).
+    """
+    comando = [caminho_ffmpeg(), "-hide_banner", "-nostdin", "-v", "error", "-y"] + list(argumentos)
+    try:
+        processo = subprocess.run(comando, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return False, str(e)
+    erro = processo.stderr.decode("utf-8", errors="replace").strip()
+    return processo.returncode == 0, erro
@@ -1,11 +1,16 @@
 import os
-import requests
+from src.httpClient import obter_cliente_http
+from src.downloader import Downloader
+from src.searchCache import obter_cache_busca
 from dotenv import load_dotenv
 
 class FreesoundAPI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cliente_http=None, cache_busca=None):
         self.base_url = "https://freesound.org/apiv2"
         self.headers = {"Authorization": f"Token {api_key}"}
+        self.http = cliente_http or obter_cliente_http()
+        self.downloader = Downloader(self.http)
+        self.cache = cache_busca or obter_cache_busca()
 
     def buscar_sons(self, query, num=10):
         url = f"{self.base_url}/search/text/"
@@ -18,10 +23,10 @@ class FreesoundAPI:
                 "page_size": 20,  # Buscar até 20 resultados por página
                 "page": page
             }
-            response = requests.get(url, headers=self.headers, params=params)
+            data = self.cache.obter("freesound", "search/text", params, lambda params=params: self._buscar_json(url, params))
 
-            if response.status_code == 200:
-                results = response.json().get('results', [])
+            if data is not None:
+                results = data.get('results', [])
                 print(f"Página {page}: {len(results)} resultados encontrados.")
 
                 # Filtrar apenas sons com preview
@@ -36,26 +41,36 @@ class FreesoundAPI:
 
                 page += 1
             else:
-                print("Erro ao buscar sons:", response.status_code, response.text)
                 break
 
         return results_com_preview[:num]
 
-    def baixar_arquivo(self, url, destino):
-        try:
-            response = requests.get(url, stream=True, headers=self.headers)
-            if response.status_code == 200:
-                with open(destino, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                print(f"Arquivo baixado: {destino}")
-                return True
-            else:
-                print(f"Erro ao baixar arquivo: {url}")
-                return False
-        except Exception as e:
-            print(f"Erro durante o download: {e}")
-            return False
+    def buscar_pagina(self, query, page=1, page_size=150):
+        """
+        Busca uma página de sons (até 150 por página) já com duração e previews.
+        Retorna (sons, total).
+        """
+        params = {
+            "query": query,
+            "page_size": page_size,
+            "page": page,
+            "fields": "id,name,duration,tags,previews,license",
+        }
+        data = self.cache.obter("freesound", "search/text", params, lambda: self._buscar_json(f"{self.base_url}/search/text/", params))
+        if data is None:
+            return [], 0
+        return data.get("results", []), data.get("count", 0)
+
+    def _buscar_json(self, url, params):
+        response = self.http.get(url, headers=self.headers, params=params)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print("Erro ao buscar sons:", response.status_code, response.text)
+            return None
+
+    def baixar_arquivo(self, url, destino, progresso=None):
+        return self.downloader.baixar(url, destino, headers=self.headers, progresso=progresso)
 
 if __name__ == "__main__":
     # Carregar variáveis de ambiente
@@ -1,48 +1,60 @@
+import io
 import os
-from google.cloud import texttospeech_v1 as texttospeech
+import wave
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from pydub import AudioSegment  # Importar a biblioteca pydub para calcular a duração do áudio
+from src.audioMetadata import duracao_audio, duracao_bytes, registrar_duracao  # Duração pelo cabeçalho, sem decodificar
+from src.narrationStorage import NARRATION_FORMAT, converter, extensao
+from src.ttsCache import CacheTTS
+from src.ttsBackends import criar_backend
+from src.scriptDocument import carregar_documento
+from src.durationEstimator import EstimadorDuracao
 
 # Carregar variáveis do .env
 load_dotenv()
 
+USE_TTS_CACHE = os.getenv("USE_TTS_CACHE", "true").lower() == "true"
+TTS_SSML_BATCH = os.getenv("TTS_SSML_BATCH", "true").lower() == "true"  # Uma requisição por linha da narração
+
 class GoogleVoice:
-    def __init__(self):
-        # Pegar a API Key do arquivo .env
-        self.API_KEY = os.getenv("GOOGLE_API_KEY")
+    """
+    Gera a narração do roteiro. A síntese em si fica no backend escolhido em
+    TTS_BACKEND (google, espeak ou fake, ver src/ttsBackends.py).
+    """
+
+    def __init__(self, cache_tts=None, backend=None, estimador=None):
         # Caminhos das pastas
         self.SCRIPT_PATH = os.path.join("scripts", "roteiro.txt")  # Caminho do roteiro
         self.OUTPUT_DIR = os.path.join("output", "audio")          # Pasta onde os áudios serão salvos
         os.makedirs(self.OUTPUT_DIR, exist_ok=True)
+        self.backend = backend or criar_backend()
+        # Áudios já sintetizados são reaproveitados entre roteiros e execuções
+        self.cache = cache_tts or (CacheTTS() if USE_TTS_CACHE else None)
+        # Previsão da duração antes da síntese, calibrada com as durações reais de cada roteiro
+        self.estimador = estimador or EstimadorDuracao()
+
+    def gerar_audio_google(self, texto, idioma="pt-BR", nome_voz="pt-BR-Wavenet-A", arquivo_audio="output.wav", usar_cache=True):
+        chave = self._chave_cache(texto, idioma, nome_voz) if self.cache and usar_cache else None
+        if chave and self._do_cache(chave, arquivo_audio):
+            return arquivo_audio
 
-    def gerar_audio_google(self, texto, idioma="pt-BR", nome_voz="pt-BR-Wavenet-A", arquivo_audio="output.wav"):
         try:
-            client = texttospeech.TextToSpeechClient(
-                client_options={"api_key": self.API_KEY}
-            )
-
-            synthesis_input = texttospeech.SynthesisInput(text=texto)
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=idioma,
-                name=nome_voz  
-            )
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                effects_profile_id=["small-bluetooth-speaker-class-device"],
-                speaking_rate=1.0,
-                pitch=0.5
-            )
-
-            response = client.synthesize_speech(
-                input=synthesis_input,
-                voice=voice,
-                audio_config=audio_config
-            )
-
-            with open(arquivo_audio, "wb") as out:
-                out.write(response.audio_content)
+            # Backends que só produzem WAV são comprimidos aqui quando NARRATION_FORMAT=ogg
+            audio = converter(self.backend.sintetizar(texto, idioma, nome_voz))
+
+            # Grava em um arquivo novo: o anterior pode ser um hard link para o cache
+            with open(arquivo_audio + ".tmp", "wb") as out:
+                out.write(audio)
+            os.replace(arquivo_audio + ".tmp", arquivo_audio)
             print(f"✅ Áudio gerado: {arquivo_audio}")
 
+            # A duração vem da própria resposta (cabeçalho do WAV ou última página do Ogg)
+            duracao = duracao_bytes(audio)
+            if duracao is not None:
+                registrar_duracao(arquivo_audio, duracao)
+            if chave:
+                self.cache.guardar(chave, arquivo_audio, duracao_audio(arquivo_audio))
+
             # Retornar o caminho do arquivo de áudio para calcular a duração
             return arquivo_audio
 
@@ -50,37 +62,126 @@ class GoogleVoice:
             print(f"❌ Erro ao gerar áudio: {e}")
             return None
 
-    def processar_roteiro(self, script_path=None):
+    def gerar_linha(self, itens, idioma="pt-BR", nome_voz="pt-BR-Wavenet-A"):
+        """
+        Gera os áudios das partes de uma linha da narração de uma só vez (ex.: uma requisição SSML).
+
+        `itens` é a lista de (texto, arquivo) das partes. O backend devolve o PCM de
+        cada parte, gravado nos arquivos separados que o adicionar_texto_e_audio
+        espera. Se o backend não conseguir (ex.: voz sem timepoints), volta para
+        uma síntese por parte. Retorna os arquivos gerados (None nas falhas).
+        """
+        validos = [(texto, arquivo) for texto, arquivo in itens if texto]
+        if len(validos) <= 1:
+            # Uma parte só não ganha nada com o lote: síntese (e cache) por parte
+            return [self.gerar_audio_google(texto, idioma, nome_voz, arquivo) for texto, arquivo in itens]
+
+        chaves = [self._chave_cache(texto, idioma, nome_voz, lote=True) for texto, _ in validos] if self.cache else []
+        if chaves and self._todos_do_cache(chaves, validos):
+            return [arquivo if texto else None for texto, arquivo in itens]
+        # A linha já pode ter caído na síntese por parte em outra execução (ex.: voz sem
+        # timepoints); sem esta consulta a requisição em lote seria paga e descartada de novo
+        if self.cache and self._todos_do_cache([self._chave_cache(texto, idioma, nome_voz) for texto, _ in validos], validos):
+            return [arquivo if texto else None for texto, arquivo in itens]
+
+        trechos = self.backend.sintetizar_partes([texto for texto, _ in validos], idioma, nome_voz)
+        if trechos is None:
+            return [self.gerar_audio_google(texto, idioma, nome_voz, arquivo) for texto, arquivo in itens]
+
+        parametros, audios = trechos
+        for posicao, ((_, arquivo), quadros) in enumerate(zip(validos, audios)):
+            wav = io.BytesIO()
+            with wave.open(wav, "wb") as saida:
+                saida.setparams(parametros)
+                saida.writeframes(quadros)
+            with open(arquivo + ".tmp", "wb") as saida:
+                saida.write(converter(wav.getvalue()))
+            os.replace(arquivo + ".tmp", arquivo)
+            duracao = len(quadros) / (parametros.sampwidth * parametros.nchannels * parametros.framerate)
+            registrar_duracao(arquivo, duracao)
+            print(f"✅ Áudio gerado: {arquivo}")
+            if chaves:
+                self.cache.guardar(chaves[posicao], arquivo, duracao)
+        return [arquivo if texto else None for texto, arquivo in itens]
+
+    def _chave_cache(self, texto, idioma, nome_voz, lote=False):
+        # O áudio gerado em lote tem outra entonação, então fica em outra entrada
+        configuracao = dict(self.backend.configuracao, backend=self.backend.nome, ssml=lote, formato=NARRATION_FORMAT)
+        return CacheTTS.chave(texto, idioma, nome_voz, configuracao)
+
+    def _todos_do_cache(self, chaves, validos):
+        """Traz do cache os áudios de todas as partes; False se faltar algum"""
+        return all([self._do_cache(chave, arquivo) for chave, (_, arquivo) in zip(chaves, validos)])
+
+    def _do_cache(self, chave, arquivo_audio):
+        duracao = self.cache.obter(chave, arquivo_audio)
+        if duracao is None:
+            return False
+        registrar_duracao(arquivo_audio, duracao)
+        print(f"♻️ Áudio reutilizado do cache: {arquivo_audio}")
+        return True
+
+    def estimar_duracao(self, script_path=None, nome_voz="pt-BR-Wavenet-A"):
+        """Duração prevista da narração (segundos), sem chamar o TTS"""
+        documento = carregar_documento(script_path or self.SCRIPT_PATH)
+        return self.estimador.estimar([texto for _, _, texto in documento.partes()], self._perfil(nome_voz), self._velocidade())
+
+    def _perfil(self, nome_voz):
+        return f"{self.backend.nome}:{nome_voz}"
+
+    def _velocidade(self):
+        return self.backend.configuracao.get("speaking_rate", 1.0)
+
+    def processar_roteiro(self, script_path=None, diretorio_saida=None):
+        """
+        :param script_path: ScriptDocument já interpretado ou caminho do roteiro.
+        :param diretorio_saida: Pasta dos áudios deste roteiro (OUTPUT_DIR por padrão).
+        """
         if script_path is None:
             script_path = self.SCRIPT_PATH
+        diretorio_saida = diretorio_saida or self.OUTPUT_DIR
 
         try:
-            with open(script_path, "r", encoding="utf-8") as file:
-                linhas = file.readlines()
-
-            narracao_id = 0  # Número da narração no roteiro
+            documento = carregar_documento(script_path)
+            os.makedirs(diretorio_saida, exist_ok=True)
             tempo_total = 0  # Variável para armazenar o tempo total de áudio
 
-            for linha in linhas:
-                if linha.startswith("NARRACAO:"):
-                    continue  
-
-                if linha.strip() and linha[0].isdigit() and "." in linha:
-                    texto_completo = linha.strip().split(". ", 1)[1]  
-                    narracao_id += 1
-                    partes = texto_completo.split(",")  # Divide a frase nas vírgulas
-                    
-                    # Gerar áudios para cada parte
-                    for parte_id, parte in enumerate(partes, start=1):
-                        parte_texto = parte.strip()
-                        arquivo_audio = os.path.join(self.OUTPUT_DIR, f"narracao_{narracao_id}_{parte_id}.wav")
-                        arquivo_gerado = self.gerar_audio_google(parte_texto, nome_voz="pt-BR-Wavenet-A", arquivo_audio=arquivo_audio)
-                        
-                        # Calcular a duração do áudio gerado e adicionar ao tempo total
-                        if arquivo_gerado:
-                            audio = AudioSegment.from_file(arquivo_gerado)
-                            duracao = len(audio) / 1000  # Converter milissegundos para segundos
-                            tempo_total += duracao
+            # (texto, arquivo) de cada parte, agrupados por linha, na ordem do roteiro. Os nomes
+            # são definidos aqui, então a ordem de conclusão não importa
+            linhas_narracao = [
+                [(texto, os.path.join(diretorio_saida, f"narracao_{narracao_id}_{parte_id}{extensao()}")) for parte_id, texto in partes]
+                for narracao_id, _, partes in documento.narracoes
+            ]
+
+            # Gerar os áudios em paralelo, reutilizando o mesmo cliente: uma requisição
+            # SSML por linha ou, com TTS_SSML_BATCH desativado, uma por parte
+            with ThreadPoolExecutor(max_workers=self.backend.concorrencia_maxima) as executor:
+                if TTS_SSML_BATCH:
+                    gerados = [arquivo for gerados_linha in executor.map(self.gerar_linha, linhas_narracao) for arquivo in gerados_linha]
+                else:
+                    gerados = list(executor.map(
+                        lambda item: self.gerar_audio_google(item[0], nome_voz="pt-BR-Wavenet-A", arquivo_audio=item[1]),
+                        [item for itens in linhas_narracao for item in itens],
+                    ))
+
+            # Calcular a duração de cada áudio gerado e adicionar ao tempo total
+            amostras = []
+            for (texto, _), arquivo_gerado in zip([item for itens in linhas_narracao for item in itens], gerados):
+                if arquivo_gerado:
+                    duracao = duracao_audio(arquivo_gerado)
+                    tempo_total += duracao
+                    amostras.append((texto, duracao))
+            self.estimador.registrar(amostras, self._perfil("pt-BR-Wavenet-A"), self._velocidade())
+
+            # Falhas que sobraram mesmo após as retentativas do backend
+            faltando = [arquivo for (texto, arquivo), gerado in zip([item for itens in linhas_narracao for item in itens], gerados)
+                        if texto and not gerado]
+            if faltando:
+                print(f"❌ {len(faltando)} partes ficaram sem áudio: {', '.join(os.path.basename(arquivo) for arquivo in faltando)}")
+            estatisticas = self.backend.estatisticas()
+            if estatisticas:
+                print(f"🔊 TTS: {estatisticas['requisicoes']} requisições, {estatisticas['retentativas']} retentativas, "
+                      f"concorrência {estatisticas['concorrencia']}, latência média {estatisticas['latencia_media']:.2f}s")
 
             print(f"✅ Todos os áudios foram gerados! Tempo total: {tempo_total:.2f} segundos.")
             return tempo_total  # Retornar o tempo total
@@ -90,9 +191,10 @@ class GoogleVoice:
             return 0  # Retornar 0 em caso de erro
 
     def testar_ambiente(self):
-        # Verifica se a API Key está disponível
-        if not self.API_KEY:
-            print("❌ Erro: GOOGLE_API_KEY não encontrada no arquivo .env.")
+        # Verifica se o backend de TTS está configurado (ex.: API Key do Google)
+        erro = self.backend.testar()
+        if erro:
+            print(f"❌ Erro: {erro}")
             return False
 
         # Verifica se o arquivo de roteiro existe
@@ -112,16 +214,15 @@ class GoogleVoice:
 
         # Teste de síntese de áudio com um texto curto
         print("🔄 Testando síntese de áudio com texto de teste...")
-        teste_audio = os.path.join(self.OUTPUT_DIR, "teste.wav")
-        resultado = self.gerar_audio_google("Teste de síntese de áudio", arquivo_audio=teste_audio)
+        teste_audio = os.path.join(self.OUTPUT_DIR, f"teste{extensao()}")
+        resultado = self.gerar_audio_google("Teste de síntese de áudio", arquivo_audio=teste_audio, usar_cache=False)
         if not resultado or not os.path.exists(resultado):
             print("❌ Erro: Falha na síntese de áudio de teste.")
             return False
 
         # Tenta carregar o áudio gerado para verificar a integridade
         try:
-            audio = AudioSegment.from_file(resultado)
-            duracao = len(audio) / 1000  # Converter milissegundos para segundos
+            duracao = duracao_audio(resultado)
             print(f"✅ Teste de síntese concluído com sucesso. Duração: {duracao:.2f} segundos.")
             # Remove o arquivo de teste
             os.remove(resultado)
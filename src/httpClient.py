@@ -0,0 +1,195 @@
+import os
+import time
+import random
+import threading
+import email.utils
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from src.replayTransport import Cassete, AdaptadorGravacao, url_replay, HTTP_RECORD_DIR, HTTP_REPLAY_URL
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+
+class ClienteHTTP:
+    """
+    Cliente HTTP compartilhado pelos provedores de mídia.
+
+    Mantém uma `requests.Session` por host (keep-alive e pool de conexões),
+    aplica timeouts e refaz a requisição com backoff exponencial em 429/5xx e
+    falhas de conexão, respeitando o cabeçalho Retry-After. Também acumula
+    latência e reutilização de conexões por host.
+
+    Com HTTP_RECORD_DIR, todas as respostas são gravadas em uma Cassete; com
+    HTTP_REPLAY_URL, as requisições vão para o ServidorReplay nesse endereço
+    (as estatísticas continuam agrupadas pelo host original).
+    """
+
+    STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+    def __init__(self, tamanho_pool=HTTP_POOL_SIZE, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                 tentativas=HTTP_RETRIES, backoff=1.0, backoff_maximo=60.0, dir_gravacao=HTTP_RECORD_DIR, url_replay=HTTP_REPLAY_URL):
+        """
+        :param tamanho_pool: Conexões mantidas abertas por host.
+        :param timeout: Timeout padrão (conexão, leitura) em segundos.
+        :param tentativas: Quantas vezes refazer uma requisição que falhou.
+        :param backoff: Espera base (segundos) do backoff exponencial.
+        :param backoff_maximo: Espera máxima entre tentativas, inclusive via Retry-After.
+        :param dir_gravacao: Pasta da Cassete onde gravar as respostas (opcional).
+        :param url_replay: Endereço de um ServidorReplay para onde redirecionar as requisições (opcional).
+        """
+        self.tamanho_pool = tamanho_pool
+        self.timeout = timeout
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.backoff_maximo = backoff_maximo
+        self.cassete = Cassete(dir_gravacao) if dir_gravacao else None
+        self.url_replay = url_replay
+        self._sessoes = {}
+        self._estatisticas = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def request(self, metodo, url, **kwargs):
+        """Mesma assinatura de `requests.request`, com pool, timeout e retentativas"""
+        host = urlsplit(url).netloc
+        sessao = self._sessao(host)
+        kwargs.setdefault("timeout", self.timeout)
+        if self.url_replay:
+            url = url_replay(url, self.url_replay)
+
+        for tentativa in range(self.tentativas + 1):
+            inicio = time.monotonic()
+            try:
+                resposta = sessao.request(metodo, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._registrar(host, time.monotonic() - inicio, erro=True)
+                if tentativa == self.tentativas:
+                    raise
+                espera = self._espera_backoff(tentativa)
+            else:
+                self._registrar(host, time.monotonic() - inicio, erro=resposta.status_code >= 400)
+                if resposta.status_code not in self.STATUS_RETENTAVEIS or tentativa == self.tentativas:
+                    return resposta
+                espera = self._espera_retry_after(resposta)
+                if espera is None:
+                    espera = self._espera_backoff(tentativa)
+                resposta.close()
+
+            with self._lock:
+                self._estatisticas[host]["retentativas"] += 1
+            time.sleep(espera)
+
+    def estatisticas(self):
+        """
+        Retorna, por host, o número de requisições, latência média/máxima, erros,
+        retentativas, conexões abertas e quantas requisições reutilizaram uma conexão.
+        """
+        resultado = {}
+        with self._lock:
+            for host, dados in self._estatisticas.items():
+                conexoes, requisicoes_pool = self._contadores_pool(self._sessoes[host])
+                resultado[host] = {
+                    "requisicoes": dados["requisicoes"],
+                    "latencia_media": dados["latencia_total"] / dados["requisicoes"] if dados["requisicoes"] else 0.0,
+                    "latencia_maxima": dados["latencia_maxima"],
+                    "erros": dados["erros"],
+                    "retentativas": dados["retentativas"],
+                    "conexoes": conexoes,
+                    "reutilizacoes": max(0, requisicoes_pool - conexoes),
+                }
+        return resultado
+
+    def fechar(self):
+        with self._lock:
+            for sessao in self._sessoes.values():
+                sessao.close()
+            self._sessoes.clear()
+
+    def _sessao(self, host):
+        with self._lock:
+            sessao = self._sessoes.get(host)
+            if sessao is None:
+                sessao = requests.Session()
+                # As retentativas são feitas aqui no cliente para respeitar o Retry-After e medir latência
+                if self.cassete:
+                    adaptador = AdaptadorGravacao(self.cassete, pool_connections=1, pool_maxsize=self.tamanho_pool, max_retries=0)
+                else:
+                    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=self.tamanho_pool, max_retries=0)
+                sessao.mount("https://", adaptador)
+                sessao.mount("http://", adaptador)
+                self._sessoes[host] = sessao
+                self._estatisticas[host] = {
+                    "requisicoes": 0,
+                    "latencia_total": 0.0,
+                    "latencia_maxima": 0.0,
+                    "erros": 0,
+                    "retentativas": 0,
+                }
+            return sessao
+
+    def _registrar(self, host, latencia, erro=False):
+        with self._lock:
+            dados = self._estatisticas[host]
+            dados["requisicoes"] += 1
+            dados["latencia_total"] += latencia
+            dados["latencia_maxima"] = max(dados["latencia_maxima"], latencia)
+            if erro:
+                dados["erros"] += 1
+
+    @staticmethod
+    def _contadores_pool(sessao):
+        """Soma conexões criadas e requisições feitas em todos os pools urllib3 da sessão"""
+        conexoes = 0
+        requisicoes = 0
+        for adaptador in set(sessao.adapters.values()):
+            pools = adaptador.poolmanager.pools
+            for chave in list(pools.keys()):
+                pool = pools.get(chave)
+                if pool is not None:
+                    conexoes += pool.num_connections
+                    requisicoes += pool.num_requests
+        return conexoes, requisicoes
+
+    def _espera_backoff(self, tentativa):
+        espera = self.backoff * (2 ** tentativa)
+        return min(self.backoff_maximo, espera + random.uniform(0, self.backoff))
+
+    def _espera_retry_after(self, resposta):
+        """Interpreta Retry-After em segundos ou como data HTTP"""
+        valor = resposta.headers.get("Retry-After")
+        if not valor:
+            return None
+        try:
+            espera = float(valor)
+        except ValueError:
+            try:
+                data = email.utils.parsedate_to_datetime(valor)
+            except (TypeError, ValueError):
+                return None
+            if data.tzinfo is None:
+                data = data.replace(tzinfo=timezone.utc)
+            espera = (data - datetime.now(timezone.utc)).total_seconds()
+        return min(self.backoff_maximo, max(0.0, espera))
+
+_cliente_compartilhado = None
+_cliente_lock = threading.Lock()
+
+def obter_cliente_http():
+    """Retorna o cliente HTTP compartilhado pelo processo"""
+    global _cliente_compartilhado
+    with _cliente_lock:
+        if _cliente_compartilhado is None:
+            _cliente_compartilhado = ClienteHTTP()
+        return _cliente_compartilhado
@@ -1,5 +1,7 @@
 import os
-import requests
+from src.httpClient import obter_cliente_http
+from src.downloader import Downloader
+from src.searchCache import obter_cache_busca
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
@@ -9,34 +11,51 @@ JAMENDO_CLIENT_ID = os.getenv("JAMENDO_CLIENT_ID")
 DOWNLOAD_DIR = "downloads/music"  # Diretório para salvar músicas
 
 class JamendoAPI:
-    def __init__(self, client_id):
+    def __init__(self, client_id, cliente_http=None, cache_busca=None):
         self.base_url = "https://api.jamendo.com/v3.0"
         self.client_id = client_id
+        self.http = cliente_http or obter_cliente_http()
+        self.downloader = Downloader(self.http)
+        self.cache = cache_busca or obter_cache_busca()
 
     def buscar_musicas(self, query, num=5):
         """Busca músicas pelo Jamendo."""
-        url = f"{self.base_url}/tracks/?client_id={self.client_id}&format=json&limit={num}&search={query}"
-        response = requests.get(url)
+        params = {"client_id": self.client_id, "format": "json", "limit": num, "search": query}
+        data = self.cache.obter("jamendo", "tracks", params, lambda: self._buscar_json(f"{self.base_url}/tracks/", params))
+        if data is None:
+            return []
+        return data.get("results", [])
+
+    def buscar_pagina(self, query, offset=0, limit=200):
+        """
+        Busca uma página de músicas (até 200 por página) com o total de resultados.
+        Retorna (musicas, total).
+        """
+        params = {
+            "client_id": self.client_id,
+            "format": "json",
+            "limit": limit,
+            "offset": offset,
+            "search": query,
+            "fullcount": "true",
+            "audioformat": "mp32",
+        }
+        data = self.cache.obter("jamendo", "tracks", params, lambda: self._buscar_json(f"{self.base_url}/tracks/", params))
+        if data is None:
+            return [], 0
+        return data.get("results", []), data.get("headers", {}).get("results_fullcount", 0)
+
+    def _buscar_json(self, url, params):
+        response = self.http.get(url, params=params)
         if response.status_code == 200:
-            data = response.json()
-            return data.get("results", [])
+            return response.json()
         else:
             print(f"Erro ao buscar músicas: {response.status_code} - {response.text}")
-            return []
+            return None
 
-    def baixar_musica(self, url, destino):
+    def baixar_musica(self, url, destino, progresso=None):
         """Baixa uma música do Jamendo."""
-        try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(destino, "wb") as arquivo:
-                    for chunk in response.iter_content(1024):
-                        arquivo.write(chunk)
-                print(f"Música baixada: {destino}")
-            else:
-                print(f"Erro ao baixar música: {url}")
-        except Exception as e:
-            print(f"Erro durante o download: {e}")
+        return self.downloader.baixar(url, destino, progresso=progresso)
 
 # Função principal para testar
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+import os
+import shutil
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", "work")
+
+class EspacoTrabalho:
+    """
+    Pastas isoladas de um job (um roteiro): áudios da narração, clipes baixados
+    e os vídeos renderizados ficam em `WORKSPACE_DIR/<roteiro>/`, então vários
+    roteiros podem ser sintetizados, baixados e renderizados ao mesmo tempo sem
+    que um leia os arquivos do outro.
+
+    Só guarda caminhos, então pode ser enviado para outro processo (render em lote).
+    """
+
+    def __init__(self, nome, raiz=WORKSPACE_DIR):
+        """
+        :param nome: Nome do arquivo do roteiro; o vídeo final mantém o nome de sempre ({nome}.mp4).
+        :param raiz: Pasta onde ficam os espaços de todos os jobs.
+        """
+        self.nome = nome
+        self.diretorio = os.path.join(raiz, os.path.splitext(nome)[0])
+        self.audio_dir = os.path.join(self.diretorio, "audio")
+        self.download_dir = os.path.join(self.diretorio, "downloads")
+        self.saida_dir = os.path.join(self.diretorio, "output")
+        self.video_base = os.path.join(self.saida_dir, "base.mp4")
+        self.video_final = os.path.join(self.saida_dir, f"{nome}.mp4")
+
+    def preparar(self):
+        """Cria as pastas vazias, descartando o que tenha sobrado de uma execução anterior"""
+        self.remover()
+        for diretorio in (self.audio_dir, self.download_dir, self.saida_dir):
+            os.makedirs(diretorio, exist_ok=True)
+        return self
+
+    def remover(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def __repr__(self):
+        return f"EspacoTrabalho({self.diretorio!r})"
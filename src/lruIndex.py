@@ -0,0 +1,149 @@
+import os
+import time
+import atexit
+import sqlite3
+import threading
+
+class IndiceLRU:
+    """
+    Índice SQLite de um cache de arquivos com remoção LRU (usado pelo MediaCache e pelo CacheTTS).
+
+    Cada linha guarda chave, arquivo (relativo a `diretorio`), tamanho, criação e
+    último acesso, além das colunas próprias de cada cache. Os acessos ficam em
+    memória e são gravados em lote: a cada `intervalo_acessos` segundos, antes
+    de uma remoção e ao fim do processo. Assim um acerto não escreve no SQLite,
+    mas uma execução só com acertos ainda atualiza a ordem LRU.
+    """
+
+    def __init__(self, diretorio, tabela, colunas=None, limite_bytes=None, intervalo_acessos=5.0):
+        """
+        :param diretorio: Pasta dos arquivos; o índice fica em `diretorio/index.sqlite`.
+        :param tabela: Tabela do índice.
+        :param colunas: Dicionário {coluna: tipo SQL} com as colunas próprias do cache.
+        :param limite_bytes: Tamanho máximo antes da remoção LRU (None: sem limite).
+        :param intervalo_acessos: Intervalo mínimo (segundos) entre duas gravações dos acessos.
+        """
+        self.diretorio = diretorio
+        self.tabela = tabela
+        self.limite_bytes = limite_bytes
+        self.intervalo_acessos = intervalo_acessos
+        self.caminho = os.path.join(diretorio, "index.sqlite")
+        self._acessos = {}  # Últimos acessos ainda não gravados no índice
+        self._ultima_gravacao = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+        extras = "".join(f" {nome} {tipo}," for nome, tipo in (colunas or {}).items())
+        with self.conectar() as conexao:
+            conexao.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabela} ("
+                f" chave TEXT PRIMARY KEY,{extras} arquivo TEXT, tamanho INTEGER, criado REAL, ultimo_acesso REAL)"
+            )
+        atexit.register(self.gravar_acessos)
+
+    def buscar(self, chave, *colunas):
+        """Retorna (arquivo, tamanho, *colunas) da entrada e registra o acesso, ou None"""
+        with self.conectar() as conexao:
+            linha = conexao.execute(
+                f"SELECT {', '.join(('arquivo', 'tamanho') + colunas)} FROM {self.tabela} WHERE chave = ?", (chave,)
+            ).fetchone()
+        if linha is not None:
+            self.registrar_acesso(chave)
+        return linha
+
+    def entradas(self, *colunas):
+        """Todas as entradas como (chave, arquivo, tamanho, *colunas)"""
+        with self.conectar() as conexao:
+            return conexao.execute(f"SELECT {', '.join(('chave', 'arquivo', 'tamanho') + colunas)} FROM {self.tabela}").fetchall()
+
+    def registrar_acesso(self, chave):
+        with self._lock:
+            self._acessos[chave] = time.time()
+            gravar = time.monotonic() - self._ultima_gravacao >= self.intervalo_acessos
+        if gravar:
+            self.gravar_acessos()
+
+    def gravar_acessos(self):
+        """Grava no índice os acessos acumulados em memória"""
+        with self._lock:
+            acessos, self._acessos = self._acessos, {}
+            self._ultima_gravacao = time.monotonic()
+        if not acessos:
+            return
+        with self.conectar() as conexao:
+            conexao.executemany(f"UPDATE {self.tabela} SET ultimo_acesso = ? WHERE chave = ?",
+                                [(momento, chave) for chave, momento in acessos.items()])
+
+    def inserir(self, chave, arquivo, tamanho, **valores):
+        """Cria ou substitui a entrada, com as colunas próprias do cache em `valores`"""
+        campos = ("chave",) + tuple(valores) + ("arquivo", "tamanho", "criado", "ultimo_acesso")
+        agora = time.time()
+        with self._lock:
+            self._acessos.pop(chave, None)
+        with self.conectar() as conexao:
+            conexao.execute(
+                f"INSERT OR REPLACE INTO {self.tabela} ({', '.join(campos)}) VALUES ({', '.join('?' * len(campos))})",
+                (chave, *valores.values(), arquivo, tamanho, agora, agora),
+            )
+
+    def remover(self, chave, arquivo=None):
+        """Apaga a entrada e o seu arquivo (`arquivo`, se a entrada não existir mais)"""
+        with self._lock:
+            self._acessos.pop(chave, None)
+        with self.conectar() as conexao:
+            linha = conexao.execute(f"SELECT arquivo FROM {self.tabela} WHERE chave = ?", (chave,)).fetchone()
+            conexao.execute(f"DELETE FROM {self.tabela} WHERE chave = ?", (chave,))
+        arquivo = linha[0] if linha else arquivo
+        if arquivo:
+            self._apagar(arquivo)
+
+    def tamanho_total(self):
+        with self.conectar() as conexao:
+            return conexao.execute(f"SELECT COALESCE(SUM(tamanho), 0) FROM {self.tabela}").fetchone()[0]
+
+    def remover_excedente(self, manter=None):
+        """Remove as entradas menos usadas recentemente até caber no limite e retorna as chaves removidas"""
+        if self.limite_bytes is None:
+            return []
+        self.gravar_acessos()  # A ordem LRU depende dos acessos ainda em memória
+        removidas = []
+        with self.conectar() as conexao:
+            total = conexao.execute(f"SELECT COALESCE(SUM(tamanho), 0) FROM {self.tabela}").fetchone()[0]
+            if total <= self.limite_bytes:
+                return removidas
+            linhas = conexao.execute(
+                f"SELECT chave, arquivo, tamanho FROM {self.tabela} WHERE chave != ? ORDER BY ultimo_acesso",
+                (manter or "",),
+            ).fetchall()
+            for chave, arquivo, tamanho in linhas:
+                if total <= self.limite_bytes:
+                    break
+                self._apagar(arquivo)
+                conexao.execute(f"DELETE FROM {self.tabela} WHERE chave = ?", (chave,))
+                removidas.append(chave)
+                total -= tamanho
+        return removidas
+
+    def conectar(self):
+        return _Conexao(sqlite3.connect(self.caminho, timeout=30))
+
+    def _apagar(self, arquivo):
+        try:
+            os.remove(os.path.join(self.diretorio, arquivo))
+        except FileNotFoundError:
+            pass
+
+class _Conexao:
+    """Conexão SQLite que faz commit e fecha ao sair do bloco `with`"""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def __enter__(self):
+        return self.conexao
+
+    def __exit__(self, tipo, valor, traceback):
+        try:
+            if tipo is None:
+                self.conexao.commit()
+        finally:
+            self.conexao.close()
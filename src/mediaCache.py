@@ -0,0 +1,124 @@
+import os
+import shutil
+import hashlib
+import threading
+from dotenv import load_dotenv
+from src.lruIndex import IndiceLRU
+
+load_dotenv()
+
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", os.path.join("cache", "media"))
+MEDIA_CACHE_MAX_GB = float(os.getenv("MEDIA_CACHE_MAX_GB", "20"))
+
+class MediaCache:
+    """
+    Cache persistente de mídias de stock compartilhado entre roteiros.
+
+    Cada entrada é identificada por (provedor, id da mídia, versão/rendição) e
+    gravada em um caminho derivado do hash dessa chave. O IndiceLRU guarda
+    tamanho e último acesso para a remoção LRU quando o limite é ultrapassado.
+    Os arquivos de cada job (ex.: downloads/video_N.mp4) são hard links para o
+    cache (ou symlinks/cópias quando o sistema de arquivos não permitir).
+    """
+
+    def __init__(self, diretorio=MEDIA_CACHE_DIR, limite_bytes=int(MEDIA_CACHE_MAX_GB * 1024 ** 3)):
+        """
+        :param diretorio: Pasta onde ficam os arquivos e o índice do cache.
+        :param limite_bytes: Tamanho máximo do cache antes da remoção LRU.
+        """
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.indice = IndiceLRU(diretorio, "midias", {"provedor": "TEXT", "media_id": "TEXT", "rendicao": "TEXT"}, limite_bytes)
+        self.acertos = 0
+        self.falhas = 0
+        self.bytes_economizados = 0
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def obter(self, provedor, media_id, rendicao, destino):
+        """Vincula a mídia em cache a `destino`. Retorna False se não estiver em cache."""
+        chave = self._chave(provedor, media_id, rendicao)
+        linha = self.indice.buscar(chave)
+        if linha is None:
+            return False
+        arquivo, tamanho = linha
+        caminho = os.path.join(self.diretorio, arquivo)
+        if not os.path.exists(caminho):
+            self.indice.remover(chave)
+            return False
+
+        vincular_arquivo(caminho, destino)
+        with self._lock:
+            self.acertos += 1
+            self.bytes_economizados += tamanho
+        print(f"♻️ Mídia reutilizada do cache: {destino}")
+        return True
+
+    def baixar(self, provedor, media_id, rendicao, url, destino, funcao_download, progresso=None):
+        """
+        Vincula a mídia a `destino`, baixando-a para o cache antes se necessário.
+
+        `funcao_download(url, caminho, progresso=...)` é a função de download do provedor.
+        """
+        chave = self._chave(provedor, media_id, rendicao)
+        # Evita que duas threads baixem a mesma mídia ao mesmo tempo
+        with self._lock_da_chave(chave):
+            if self.obter(provedor, media_id, rendicao, destino):
+                return True
+
+            with self._lock:
+                self.falhas += 1
+            arquivo = self._arquivo(chave)
+            caminho = os.path.join(self.diretorio, arquivo)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            if not funcao_download(url, caminho, progresso=progresso):
+                return False
+
+            self.indice.inserir(chave, arquivo, os.path.getsize(caminho),
+                                provedor=provedor, media_id=str(media_id), rendicao=str(rendicao))
+            vincular_arquivo(caminho, destino)
+            self.indice.remover_excedente(manter=chave)
+            return True
+
+    def remover(self, provedor, media_id, rendicao):
+        """Descarta uma entrada do cache (ex.: arquivo reprovado na validação)"""
+        chave = self._chave(provedor, media_id, rendicao)
+        self.indice.remover(chave, self._arquivo(chave))
+
+    def tamanho_total(self):
+        return self.indice.tamanho_total()
+
+    def estatisticas(self):
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "bytes_economizados": self.bytes_economizados,
+            "tamanho_total": self.tamanho_total(),
+        }
+
+    @staticmethod
+    def _chave(provedor, media_id, rendicao):
+        return f"{provedor}:{media_id}:{rendicao}"
+
+    @staticmethod
+    def _arquivo(chave):
+        resumo = hashlib.sha256(chave.encode("utf-8")).hexdigest()
+        return os.path.join(resumo[:2], f"{resumo}.mp4")
+
+    def _lock_da_chave(self, chave):
+        with self._lock:
+            if chave not in self._locks:
+                self._locks[chave] = threading.Lock()
+            return self._locks[chave]
+
+def vincular_arquivo(origem, destino):
+    """Cria `destino` como hard link para `origem`, com symlink ou cópia como alternativa"""
+    if os.path.lexists(destino):
+        os.remove(destino)
+    try:
+        os.link(origem, destino)
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(origem), destino)
+        except OSError:
+            shutil.copy2(origem, destino)
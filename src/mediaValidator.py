@@ -0,0 +1,74 @@
+import os
+import time
+import uuid
+import shutil
+import subprocess
+from src.ffmpegTools import caminho_ffmpeg
+
+class ValidadorMidia:
+    """
+    Valida cada vídeo logo após o download, antes de ele chegar ao criar_video.
+
+    A verificação tem três etapas rápidas: o cabeçalho do arquivo (caixa `ftyp`
+    de um MP4), a decodificação do primeiro quadro e a do último keyframe (com
+    -sseof; um arquivo truncado não entrega nenhum quadro ali). Arquivos inválidos vão
+    para a pasta de quarentena, para análise posterior.
+    """
+
+    def __init__(self, dir_quarentena=os.path.join("downloads", "quarantine"), timeout=60):
+        """
+        :param dir_quarentena: Pasta para onde os arquivos inválidos são movidos.
+        :param timeout: Tempo máximo (segundos) de cada decodificação de teste.
+        """
+        self.dir_quarentena = dir_quarentena
+        self.timeout = timeout
+
+    def validar(self, caminho):
+        """Retorna (valido, motivo)"""
+        try:
+            with open(caminho, "rb") as arquivo:
+                cabecalho = arquivo.read(12)
+        except OSError as e:
+            return False, f"arquivo ilegível: {e}"
+        if len(cabecalho) < 12 or cabecalho[4:8] != b"ftyp":
+            return False, "cabeçalho MP4 (ftyp) ausente"
+
+        sucesso, erro = self._decodificar(["-i", caminho])
+        if not sucesso:
+            return False, f"primeiro quadro não decodifica: {erro}"
+
+        sucesso, erro = self._decodificar(["-sseof", "-1", "-i", caminho])
+        if not sucesso:
+            return False, f"último keyframe não decodifica: {erro}"
+
+        return True, None
+
+    def quarentenar(self, caminho, motivo=None):
+        """Move o arquivo para a quarentena e retorna o novo caminho"""
+        os.makedirs(self.dir_quarentena, exist_ok=True)
+        # Vários jobs podem quarentenar um video_N.mp4 no mesmo segundo; o sufixo aleatório evita sobrescrever
+        nome = f"{int(time.time())}_{uuid.uuid4().hex[:12]}_{os.path.basename(caminho)}"
+        destino = os.path.join(self.dir_quarentena, nome)
+        shutil.move(caminho, destino)
+        if motivo:
+            with open(destino + ".txt", "w", encoding="utf-8") as arquivo:
+                arquivo.write(motivo)
+        print(f"🚫 Vídeo inválido movido para a quarentena: {destino} ({motivo})")
+        return destino
+
+    def _decodificar(self, entrada):
+        """Decodifica um quadro e retorna (sucesso, erro); o framecrc lista um quadro por linha no stdout"""
+        comando = [caminho_ffmpeg(), "-hide_banner", "-nostdin", "-v", "error", "-xerror"] + entrada + [
+            "-map", "0:v:0", "-frames:v", "1", "-f", "framecrc", "-"]
+        try:
+            processo = subprocess.run(comando, capture_output=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return False, str(e)
+        erro = processo.stderr.decode("utf-8", errors="replace").strip()
+        quadros = [linha for linha in processo.stdout.splitlines() if linha and not linha.startswith(b"#")]
+        # Com -v error, qualquer mensagem indica dados corrompidos mesmo com código de saída 0
+        if processo.returncode != 0 or erro:
+            return False, erro
+        if not quadros:
+            return False, "nenhum quadro decodificado"
+        return True, None
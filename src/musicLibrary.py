@@ -0,0 +1,257 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+import numpy as np
+from pydub import AudioSegment
+from sortedcontainers import SortedList
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MUSIC_LIBRARY_DIR = os.getenv("MUSIC_LIBRARY_DIR", os.path.join("musics", "library"))
+MUSIC_LIBRARY_WORKERS = int(os.getenv("MUSIC_LIBRARY_WORKERS", "4"))
+
+class BibliotecaMusical:
+    """
+    Biblioteca local de músicas de fundo alimentada pelo Jamendo e pelo Freesound.
+
+    A ingestão roda em segundo plano: busca várias páginas de cada provedor em
+    paralelo, baixa as faixas e calcula uma única vez duração, loudness (dBFS) e
+    tempo (BPM), guardando tudo em um índice SQLite. Em memória, cada humor tem
+    uma SortedList ordenada por duração, então escolher uma faixa é O(log n) e
+    nunca acessa a rede durante a renderização.
+    """
+
+    TODOS = "*"
+
+    def __init__(self, diretorio=MUSIC_LIBRARY_DIR, jamendo=None, freesound=None, max_workers=MUSIC_LIBRARY_WORKERS):
+        """
+        :param diretorio: Pasta das faixas e do índice.
+        :param jamendo: JamendoAPI usada na ingestão (opcional).
+        :param freesound: FreesoundAPI usada na ingestão (opcional).
+        :param max_workers: Páginas/downloads/análises simultâneos durante a ingestão.
+        """
+        self.diretorio = diretorio
+        self.jamendo = jamendo
+        self.freesound = freesound
+        self.max_workers = max_workers
+        self.indice = os.path.join(diretorio, "index.sqlite")
+        self._por_humor = {self.TODOS: SortedList()}
+        self._faixas = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._executor = None
+        os.makedirs(diretorio, exist_ok=True)
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS faixas ("
+                " chave TEXT PRIMARY KEY, provedor TEXT, media_id TEXT, titulo TEXT, humor TEXT,"
+                " arquivo TEXT, duracao REAL, loudness REAL, tempo REAL, criado REAL)"
+            )
+        self._carregar_indice()
+
+    def escolher(self, duracao_minima, humor=None):
+        """
+        Retorna a faixa mais curta com pelo menos `duracao_minima` segundos (para não
+        precisar repetir a música) do humor pedido; se nenhuma for longa o suficiente,
+        a mais longa. Retorna None se a biblioteca estiver vazia.
+        """
+        with self._lock:
+            faixas = self._por_humor.get(humor or self.TODOS)
+            if not faixas:
+                faixas = self._por_humor[self.TODOS]
+            if not faixas:
+                return None
+            posicao = faixas.bisect_left((duracao_minima, ""))
+            _, chave = faixas[posicao] if posicao < len(faixas) else faixas[-1]
+            return dict(self._faixas[chave])
+
+    def quantidade(self):
+        with self._lock:
+            return len(self._faixas)
+
+    def iniciar_ingestao(self, humores, faixas_por_humor=50):
+        """Roda `ingerir` em uma thread em segundo plano e a retorna"""
+        thread = threading.Thread(target=self.ingerir, args=(humores, faixas_por_humor), daemon=True)
+        thread.start()
+        return thread
+
+    def parar_ingestao(self):
+        """
+        Interrompe a ingestão em segundo plano: as tarefas pendentes são canceladas
+        e só as que já estão rodando (no máximo uma por worker) terminam.
+        """
+        self._parar.set()
+        with self._lock:
+            executor = self._executor
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def ingerir(self, humores, faixas_por_humor=50):
+        """Busca, baixa e analisa até `faixas_por_humor` faixas por humor em cada provedor"""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        with self._lock:
+            self._executor = executor
+        adicionadas = 0
+        try:
+            encontradas = []
+            for humor in humores:
+                if self.jamendo:
+                    encontradas += self._buscar_jamendo(executor, humor, faixas_por_humor)
+                if self.freesound:
+                    encontradas += self._buscar_freesound(executor, humor, faixas_por_humor)
+
+            # Uma faixa encontrada em mais de um humor fica com o primeiro
+            novas = {}
+            for faixa in encontradas:
+                if not self._contem(faixa["chave"]):
+                    novas.setdefault(faixa["chave"], faixa)
+            for futuro in [executor.submit(self._ingerir_faixa, faixa) for faixa in novas.values()]:
+                adicionadas += bool(futuro.result())
+        except (CancelledError, RuntimeError):
+            # parar_ingestao cancelou as tarefas pendentes ou fechou o executor no meio das buscas
+            if not self._parar.is_set():
+                raise
+            print("🎵 Ingestão da biblioteca musical interrompida.")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                self._executor = None
+
+        print(f"🎵 Biblioteca musical: {adicionadas} faixas novas, {self.quantidade()} no total.")
+        return adicionadas
+
+    def _buscar_jamendo(self, executor, humor, limite):
+        """Busca as páginas do Jamendo em paralelo a partir do total informado na primeira"""
+        por_pagina = min(200, limite)
+        primeira, total = self.jamendo.buscar_pagina(humor, offset=0, limit=por_pagina)
+        offsets = range(por_pagina, min(int(total or 0), limite), por_pagina)
+        paginas = [primeira] + [musicas for musicas, _ in executor.map(
+            lambda offset: self.jamendo.buscar_pagina(humor, offset=offset, limit=por_pagina), offsets)]
+        return [
+            {
+                "chave": f"jamendo:{musica['id']}",
+                "provedor": "jamendo",
+                "media_id": musica["id"],
+                "titulo": f"{musica.get('name')} - {musica.get('artist_name')}",
+                "humor": humor,
+                "url": musica.get("audio"),
+                "baixar": self.jamendo.baixar_musica,
+            }
+            for pagina in paginas for musica in pagina if musica.get("audio")
+        ][:limite]
+
+    def _buscar_freesound(self, executor, humor, limite):
+        """Busca as páginas do Freesound em paralelo a partir do total informado na primeira"""
+        por_pagina = min(150, limite)
+        primeira, total = self.freesound.buscar_pagina(humor, page=1, page_size=por_pagina)
+        num_paginas = min(math.ceil(int(total or 0) / por_pagina), math.ceil(limite / por_pagina))
+        paginas = [primeira] + [sons for sons, _ in executor.map(
+            lambda pagina: self.freesound.buscar_pagina(humor, page=pagina, page_size=por_pagina), range(2, num_paginas + 1))]
+        return [
+            {
+                "chave": f"freesound:{som['id']}",
+                "provedor": "freesound",
+                "media_id": som["id"],
+                "titulo": som.get("name"),
+                "humor": humor,
+                "url": som["previews"]["preview-hq-mp3"],
+                "baixar": self.freesound.baixar_arquivo,
+            }
+            for pagina in paginas for som in pagina if "preview-hq-mp3" in som.get("previews", {})
+        ][:limite]
+
+    def _ingerir_faixa(self, faixa):
+        if self._parar.is_set():
+            return False
+        arquivo = f"{faixa['provedor']}_{faixa['media_id']}.mp3"
+        caminho = os.path.join(self.diretorio, arquivo)
+        if not os.path.exists(caminho) and not faixa["baixar"](faixa["url"], caminho):
+            return False
+
+        try:
+            metadados = self.analisar(caminho)
+        except Exception as e:
+            print(f"Erro ao analisar a faixa {caminho}: {e}")
+            return False
+
+        registro = {
+            "chave": faixa["chave"],
+            "provedor": faixa["provedor"],
+            "media_id": str(faixa["media_id"]),
+            "titulo": faixa["titulo"],
+            "humor": faixa["humor"],
+            "arquivo": arquivo,
+            **metadados,
+        }
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO faixas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (registro["chave"], registro["provedor"], registro["media_id"], registro["titulo"], registro["humor"],
+                 registro["arquivo"], registro["duracao"], registro["loudness"], registro["tempo"], time.time()),
+            )
+        self._indexar(registro)
+        return True
+
+    @staticmethod
+    def analisar(caminho):
+        """Calcula duração (s), loudness (dBFS) e tempo estimado (BPM) de um arquivo de áudio"""
+        audio = AudioSegment.from_file(caminho)
+        amostras = np.array(audio.set_channels(1).get_array_of_samples(), dtype=np.float32)
+        return {
+            "duracao": len(audio) / 1000,
+            "loudness": audio.dBFS if audio.rms else None,
+            "tempo": BibliotecaMusical._estimar_tempo(amostras, audio.frame_rate),
+        }
+
+    @staticmethod
+    def _estimar_tempo(amostras, taxa, bpm_minimo=60, bpm_maximo=180):
+        """BPM pela autocorrelação do fluxo de energia (janelas de ~10 ms)"""
+        janela = max(1, taxa // 100)
+        num_janelas = len(amostras) // janela
+        if num_janelas < 400:
+            return None
+        energia = np.sqrt(np.mean(amostras[:num_janelas * janela].reshape(num_janelas, janela) ** 2, axis=1))
+        fluxo = np.maximum(np.diff(energia), 0)
+        fluxo -= fluxo.mean()
+        autocorrelacao = np.correlate(fluxo, fluxo, mode="full")[len(fluxo) - 1:]
+        janelas_por_segundo = taxa / janela
+        atraso_minimo = int(janelas_por_segundo * 60 / bpm_maximo)
+        atraso_maximo = int(janelas_por_segundo * 60 / bpm_minimo)
+        if atraso_maximo >= len(autocorrelacao):
+            return None
+        atraso = atraso_minimo + int(np.argmax(autocorrelacao[atraso_minimo:atraso_maximo + 1]))
+        return round(60 * janelas_por_segundo / atraso, 1)
+
+    def _carregar_indice(self):
+        with closing(self._conectar()) as conexao:
+            linhas = conexao.execute(
+                "SELECT chave, provedor, media_id, titulo, humor, arquivo, duracao, loudness, tempo FROM faixas"
+            ).fetchall()
+        for chave, provedor, media_id, titulo, humor, arquivo, duracao, loudness, tempo in linhas:
+            if os.path.exists(os.path.join(self.diretorio, arquivo)):
+                self._indexar({
+                    "chave": chave, "provedor": provedor, "media_id": media_id, "titulo": titulo, "humor": humor,
+                    "arquivo": arquivo, "duracao": duracao, "loudness": loudness, "tempo": tempo,
+                })
+
+    def _indexar(self, registro):
+        registro = dict(registro, caminho=os.path.join(self.diretorio, registro["arquivo"]))
+        with self._lock:
+            if registro["chave"] in self._faixas:
+                return
+            self._faixas[registro["chave"]] = registro
+            entrada = (registro["duracao"], registro["chave"])
+            self._por_humor[self.TODOS].add(entrada)
+            self._por_humor.setdefault(registro["humor"], SortedList()).add(entrada)
+
+    def _contem(self, chave):
+        with self._lock:
+            return chave in self._faixas
+
+    def _conectar(self):
+        return sqlite3.connect(self.indice, timeout=30)
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import numpy as np
+from moviepy.audio.AudioClip import AudioArrayClip
+from moviepy.audio.io.AudioFileClip import AudioFileClip
+from dotenv import load_dotenv
+from src.ffmpegTools import caminho_ffmpeg
+
+load_dotenv()
+
+NARRATION_FORMAT = (os.getenv("NARRATION_FORMAT") or "wav").lower()  # wav (LINEAR16) ou ogg (Opus)
+NARRATION_OPUS_BITRATE = os.getenv("NARRATION_OPUS_BITRATE", "48k")
+
+EXTENSOES = {"wav": ".wav", "ogg": ".ogg"}
+
+def extensao(formato=NARRATION_FORMAT):
+    return EXTENSOES[formato]
+
+def arquivo_narracao(diretorio, narracao_id, parte_id):
+    """Caminho do áudio de uma parte da narração, no formato em que ele foi gravado"""
+    preferido = os.path.join(diretorio, f"narracao_{narracao_id}_{parte_id}{extensao()}")
+    if os.path.exists(preferido):
+        return preferido
+    for outra in EXTENSOES.values():
+        caminho = os.path.join(diretorio, f"narracao_{narracao_id}_{parte_id}{outra}")
+        if os.path.exists(caminho):
+            return caminho
+    return preferido
+
+def converter(audio, formato=NARRATION_FORMAT):
+    """Converte os bytes de um WAV para o formato de armazenamento (sem efeito se já estiverem nele)"""
+    if formato == "wav" or audio[:4] == b"OggS":
+        return audio
+    processo = subprocess.run(
+        [caminho_ffmpeg(), "-hide_banner", "-nostdin", "-v", "error", "-f", "wav", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", NARRATION_OPUS_BITRATE, "-f", "ogg", "pipe:1"],
+        input=audio, capture_output=True, check=True,
+    )
+    return processo.stdout
+
+def decodificar(caminho, fps=44100, canais=2):
+    """
+    Decodifica a narração comprimida para PCM em memória e a retorna como AudioArrayClip,
+    sem gravar um WAV intermediário em disco.
+    """
+    processo = subprocess.run(
+        [caminho_ffmpeg(), "-hide_banner", "-nostdin", "-v", "error", "-i", caminho,
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ar", str(fps), "-ac", str(canais), "pipe:1"],
+        capture_output=True, check=True,
+    )
+    amostras = np.frombuffer(processo.stdout, dtype="<i2").reshape(-1, canais).astype(np.float32) / 32768
+    return AudioArrayClip(amostras, fps=fps)
+
+def carregar_narracao(caminho):
+    """Clip de áudio de uma parte da narração: Opus é decodificado em memória, WAV é lido direto"""
+    if os.path.splitext(caminho)[1] == ".ogg":
+        return decodificar(caminho)
+    return AudioFileClip(caminho)
@@ -0,0 +1,105 @@
+import os
+from src.ffmpegTools import executar_ffmpeg
+from src.httpClient import obter_cliente_http
+from src.replayTransport import url_replay, HTTP_RECORD_DIR
+
+class BaixadorParcial:
+    """
+    Baixa apenas o trecho inicial de um vídeo remoto.
+
+    O ffmpeg lê o MP4 direto por HTTP (usando requisições Range para localizar o
+    átomo moov, esteja ele no início ou no fim do arquivo) e remuxa, sem
+    reencodar, só os primeiros `duracao` segundos para um arquivo local. Para
+    clipes longos isso baixa uma fração do arquivo inteiro. Se o servidor não
+    aceitar Range (o ffmpeg leria o arquivo inteiro, talvez mais de uma vez) ou
+    o ffmpeg falhar, cai no download completo.
+
+    Gravando uma cassete (HTTP_RECORD_DIR), o ffmpeg não passaria pelo
+    AdaptadorGravacao; então o arquivo é baixado inteiro pelo `download_completo`
+    (e gravado) e o trecho é cortado localmente. No replay o ServidorReplay
+    atende os Range do ffmpeg a partir dessa resposta completa.
+    """
+
+    def __init__(self, duracao, download_completo=None, headers=None, timeout=300, gravando=bool(HTTP_RECORD_DIR)):
+        """
+        :param duracao: Segundos iniciais a manter de cada vídeo.
+        :param download_completo: Função `(url, destino, progresso=None)` usada como alternativa.
+        :param headers: Cabeçalhos HTTP enviados pelo ffmpeg (ex.: Authorization).
+        :param timeout: Tempo máximo (segundos) de cada execução do ffmpeg.
+        :param gravando: Baixar pelo `download_completo` para que a mídia entre na cassete.
+        """
+        self.duracao = duracao
+        self.download_completo = download_completo
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.gravando = gravando and download_completo is not None
+
+    def baixar(self, url, destino, progresso=None):
+        """Mesma assinatura de `baixar_arquivo` dos provedores, para uso no GerenciadorDownloads"""
+        if self.gravando:
+            return self.baixar_gravando(url, destino, progresso)
+
+        if self.download_completo is not None and not self.aceita_range(url):
+            print(f"Servidor sem suporte a Range, baixando o arquivo completo: {url}")
+            return self.download_completo(url, destino, progresso=progresso)
+
+        if self.baixar_trecho(url, destino):
+            if progresso:
+                progresso(os.path.getsize(destino))
+            print(f"Trecho de {self.duracao}s baixado: {destino}")
+            return True
+
+        if self.download_completo is None:
+            return False
+        print(f"Download parcial falhou, baixando o arquivo completo: {url}")
+        return self.download_completo(url, destino, progresso=progresso)
+
+    def baixar_gravando(self, url, destino, progresso=None):
+        """Download completo (passa pela cassete) e corte local do trecho inicial"""
+        completo = destino + ".completo.mp4"
+        if not self.download_completo(url, completo, progresso=progresso):
+            return False
+        if self._remuxar(completo, destino, []):
+            os.remove(completo)
+            print(f"Trecho de {self.duracao}s cortado do download gravado: {destino}")
+        else:
+            os.replace(completo, destino)  # Sem o corte, fica o arquivo inteiro
+        return True
+
+    def aceita_range(self, url):
+        """Pede o primeiro byte do arquivo; só uma resposta 206 indica que o servidor atende Range"""
+        try:
+            resposta = obter_cliente_http().get(url, headers={**self.headers, "Range": "bytes=0-0"}, stream=True)
+        except Exception as e:
+            print(f"Erro ao verificar suporte a Range em {url}: {e}")
+            return True  # Na dúvida, o ffmpeg tenta e, se falhar, cai no download completo
+        resposta.close()
+        return resposta.status_code == 206
+
+    def baixar_trecho(self, url, destino):
+        argumentos = []
+        if self.headers:
+            argumentos += ["-headers", "".join(f"{nome}: {valor}\r\n" for nome, valor in self.headers.items())]
+        return self._remuxar(url_replay(url), destino, argumentos, url)
+
+    def _remuxar(self, entrada, destino, argumentos, descricao=None):
+        """Copia (sem reencodar) os primeiros `duracao` segundos de `entrada` (URL ou arquivo) para `destino`"""
+        parcial = destino + ".part.mp4"
+        argumentos = argumentos + [
+            "-i", entrada,
+            "-t", str(self.duracao),
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-movflags", "+faststart",
+            "-f", "mp4", parcial,
+        ]
+        sucesso, erro = executar_ffmpeg(argumentos, timeout=self.timeout)
+        if not sucesso or not os.path.exists(parcial) or os.path.getsize(parcial) == 0:
+            if erro:
+                print(f"Erro no download parcial de {descricao or entrada}: {erro}")
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            return False
+
+        os.replace(parcial, destino)
+        return True
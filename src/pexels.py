@@ -1,45 +1,76 @@
-import requests
+from src.httpClient import obter_cliente_http
+from src.downloader import Downloader
+from src.searchCache import obter_cache_busca
+from src.renditionSelector import orientacao
 
 class PexelsAPI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cliente_http=None, cache_busca=None):
         self.base_url = "https://api.pexels.com/v1"
         self.headers = {"Authorization": api_key}
+        self.http = cliente_http or obter_cliente_http()
+        self.downloader = Downloader(self.http)
+        self.cache = cache_busca or obter_cache_busca()
     
     def buscar_imagens(self, query, num=5):
-        url = f"{self.base_url}/search?query={query}&per_page={num}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json()['photos']
-        else:
-            print("Erro ao buscar imagens:", response.status_code, response.text)
+        url = f"{self.base_url}/search"
+        params = {"query": query, "per_page": num}
+        dados = self.cache.obter("pexels", "search", params, lambda: self._buscar_json(url, params, "Erro ao buscar imagens:"))
+        if dados is None:
             return []
+        return dados['photos']
 
     def buscar_videos(self, query, num=5, orientation="portrait"):
-        url = f"{self.base_url}/videos/search?query={query}&per_page={num}&orientation={orientation}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            videos = response.json()['videos']
-            for video in videos:
-                # Pega a versão com maior qualidade disponível (maior width)
-                video['video_files'].sort(key=lambda x: x['width'], reverse=True)
-                video['best_quality_url'] = video['video_files'][0]['link']  # Maior resolução disponível
-            return videos
-        else:
-            print("Erro ao buscar vídeos:", response.status_code, response.text)
+        url = f"{self.base_url}/videos/search"
+        params = {"query": query, "per_page": num, "orientation": orientation}
+        dados = self.cache.obter("pexels", "videos/search", params, lambda: self._buscar_json(url, params, "Erro ao buscar vídeos:"))
+        if dados is None:
             return []
+        videos = dados['videos']
+        for video in videos:
+            # Pega a versão com maior qualidade disponível (maior width)
+            video['video_files'].sort(key=lambda x: x['width'] or 0, reverse=True)
+            video['best_quality_url'] = video['video_files'][0]['link']  # Maior resolução disponível
+        return videos
+
+    def buscar_candidatos(self, query, num=50, orientation="portrait"):
+        """Busca vídeos e os normaliza no formato de candidato usado pela BuscaFederada"""
+        return [self.normalizar_video(video) for video in self.buscar_videos(query, num=num, orientation=orientation)]
 
-    def baixar_arquivo(self, url, destino):
-        try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(destino, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                print(f"Arquivo baixado: {destino}")
-                return True
-            else:
-                print(f"Erro ao baixar arquivo: {url}")
-                return False
-        except Exception as e:
-            print(f"Erro durante o download: {e}")
-            return False
+    def normalizar_video(self, video):
+        rendicoes = self.rendicoes(video)
+        maior = max(rendicoes, key=lambda r: (r['largura'] or 0) * (r['altura'] or 0), default=None)
+        return {
+            "id": video['id'],
+            "provedor": "pexels",
+            "duracao": video['duration'],
+            "rendicoes": rendicoes,
+            "orientacao": orientacao(maior),
+            "autor": (video.get('user') or {}).get('name'),
+            "url_pagina": video['url'],
+        }
+
+    def rendicoes(self, video):
+        """Lista as versões MP4 de um vídeo no formato usado pelo RenditionSelector"""
+        return [
+            {
+                "nome": arquivo.get('id') or arquivo.get('quality'),
+                "url": arquivo['link'],
+                "largura": arquivo.get('width'),
+                "altura": arquivo.get('height'),
+                "tamanho": arquivo.get('size'),
+                "fps": arquivo.get('fps'),
+            }
+            for arquivo in video['video_files']
+            if arquivo.get('file_type') == "video/mp4"
+        ]
+
+    def baixar_arquivo(self, url, destino, progresso=None):
+        return self.downloader.baixar(url, destino, progresso=progresso)
+
+    def _buscar_json(self, url, params, mensagem_erro):
+        response = self.http.get(url, headers=self.headers, params=params)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(mensagem_erro, response.status_code, response.text)
+            return None
@@ -0,0 +1,100 @@
+import time
+import queue
+import threading
+import traceback
+
+_FIM = object()
+
+class ExecutorPipeline:
+    """
+    Executa uma sequência de etapas sobre vários itens, como uma linha de montagem.
+
+    Cada etapa tem os seus próprios workers (threads) e entre duas etapas há
+    uma fila limitada: enquanto o item N está na etapa 3, o N+1 pode estar na
+    etapa 2 e o N+2 na etapa 1, e uma etapa lenta segura as anteriores em vez
+    de acumular trabalho na memória. A vazão do lote fica limitada pela etapa
+    mais lenta, não pela soma de todas.
+
+    Uma etapa é (nome, funcao, workers): `funcao(item)` retorna o item que
+    segue para a próxima etapa. Se ela levantar uma exceção, o erro é
+    registrado e o item sai da linha.
+    """
+
+    def __init__(self, etapas, capacidade_fila=1):
+        """
+        :param etapas: Lista de (nome, funcao, workers), na ordem de execução.
+        :param capacidade_fila: Itens que podem esperar entre duas etapas.
+        """
+        self.etapas = [(nome, funcao, max(1, workers)) for nome, funcao, workers in etapas]
+        self.capacidade_fila = capacidade_fila
+        self._estatisticas = {nome: {"concluidos": 0, "falhas": 0, "tempo_ocupado": 0.0} for nome, _, _ in self.etapas}
+        self._lock = threading.Lock()
+
+    def executar(self, itens):
+        """Passa cada item por todas as etapas e retorna os que chegaram ao fim, na ordem de conclusão"""
+        filas = [queue.Queue(maxsize=self.capacidade_fila) for _ in self.etapas]
+        saida = queue.Queue()
+        filas.append(saida)
+        threads = []
+        for posicao, (nome, funcao, workers) in enumerate(self.etapas):
+            restantes = [workers]  # Workers ainda ativos nesta etapa; o último avisa a próxima
+            for indice in range(workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(nome, funcao, filas[posicao], filas[posicao + 1], restantes,
+                          self.etapas[posicao + 1][2] if posicao + 1 < len(self.etapas) else 1),
+                    name=f"pipeline-{nome}-{indice + 1}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        # Alimenta a primeira etapa; bloqueia quando a fila está cheia (contrapressão)
+        for item in itens:
+            filas[0].put(item)
+        for _ in range(self.etapas[0][2]):
+            filas[0].put(_FIM)
+
+        for thread in threads:
+            thread.join()
+        concluidos = []
+        while True:
+            item = saida.get()
+            if item is _FIM:
+                break
+            concluidos.append(item)
+        return concluidos
+
+    def estatisticas(self):
+        """Por etapa: itens concluídos, falhas e tempo somado dos workers ocupados"""
+        with self._lock:
+            return {nome: dict(valores) for nome, valores in self._estatisticas.items()}
+
+    def _worker(self, nome, funcao, entrada, proxima, restantes, workers_proxima):
+        while True:
+            item = entrada.get()
+            if item is _FIM:
+                break
+            inicio = time.monotonic()
+            try:
+                resultado = funcao(item)
+            except Exception as e:
+                print(f"❌ Etapa {nome} falhou: {e}")
+                traceback.print_exc()
+                self._registrar(nome, time.monotonic() - inicio, falha=True)
+                continue
+            self._registrar(nome, time.monotonic() - inicio)
+            proxima.put(resultado)
+
+        with self._lock:
+            restantes[0] -= 1
+            ultimo = restantes[0] == 0
+        if ultimo:
+            for _ in range(workers_proxima):
+                proxima.put(_FIM)
+
+    def _registrar(self, nome, duracao, falha=False):
+        with self._lock:
+            estatisticas = self._estatisticas[nome]
+            estatisticas["falhas" if falha else "concluidos"] += 1
+            estatisticas["tempo_ocupado"] += duracao
@@ -1,9 +1,15 @@
-import requests
+from src.httpClient import obter_cliente_http
+from src.downloader import Downloader
+from src.searchCache import obter_cache_busca
+from src.renditionSelector import orientacao
 
 class PixabayAPI:
-    def __init__(self, api_key):
+    def __init__(self, api_key, cliente_http=None, cache_busca=None):
         self.api_key = api_key
         self.base_url = "https://pixabay.com/api"
+        self.http = cliente_http or obter_cliente_http()
+        self.downloader = Downloader(self.http)
+        self.cache = cache_busca or obter_cache_busca()
     
     def buscar_imagens(self, query, num=3, orientation="vertical"):
         url = f"{self.base_url}/"
@@ -13,12 +19,10 @@ class PixabayAPI:
             "per_page": num,
             "orientation": orientation
         }
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            return response.json().get("hits", [])
-        else:
-            print("Erro ao buscar imagens:", response.status_code, response.text)
+        dados = self.cache.obter("pixabay", "images", params, lambda: self._buscar_json(url, params, "Erro ao buscar imagens:"))
+        if dados is None:
             return []
+        return dados.get("hits", [])
 
     def buscar_videos(self, query, num=5):
         url = f"https://pixabay.com/api/videos/"
@@ -28,31 +32,55 @@ class PixabayAPI:
             'per_page': num
         }
 
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            videos = response.json()['hits']
-            for video in videos:
-                if "medium" in video["videos"]:  # Verifica se existe a versão 'medium' (maior qualidade)
-                    video['best_quality_url'] = video["videos"]["medium"]["url"]
-                else:
-                    video['best_quality_url'] = video["videos"]["small"]["url"]  # Se não houver, usa "small"
-            return videos
-        else:
-            print("Erro ao buscar vídeos no Pixabay:", response.status_code, response.text)
+        dados = self.cache.obter("pixabay", "videos", params, lambda: self._buscar_json(url, params, "Erro ao buscar vídeos no Pixabay:"))
+        if dados is None:
             return []
-        
-    def baixar_arquivo(self, url, destino):
-        try:
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with open(destino, "wb") as f:
-                    for chunk in response.iter_content(1024):
-                        f.write(chunk)
-                print(f"Arquivo baixado: {destino}")
-                return True
+        videos = dados['hits']
+        for video in videos:
+            if "medium" in video["videos"]:  # Verifica se existe a versão 'medium' (maior qualidade)
+                video['best_quality_url'] = video["videos"]["medium"]["url"]
             else:
-                print(f"Erro ao baixar arquivo: {url}")
-                return False
-        except Exception as e:
-            print(f"Erro durante o download: {e}")
-            return False
\ No newline at end of file
+                video['best_quality_url'] = video["videos"]["small"]["url"]  # Se não houver, usa "small"
+        return videos
+        
+    def buscar_candidatos(self, query, num=50):
+        """Busca vídeos e os normaliza no formato de candidato usado pela BuscaFederada"""
+        return [self.normalizar_video(video) for video in self.buscar_videos(query, num=num)]
+
+    def normalizar_video(self, video):
+        rendicoes = self.rendicoes(video)
+        maior = max(rendicoes, key=lambda r: (r['largura'] or 0) * (r['altura'] or 0), default=None)
+        return {
+            "id": video['id'],
+            "provedor": "pixabay",
+            "duracao": video['duration'],
+            "rendicoes": rendicoes,
+            "orientacao": orientacao(maior),
+            "autor": video.get('user'),
+            "url_pagina": video['pageURL'],
+        }
+
+    def rendicoes(self, video):
+        """Lista as versões (large, medium, small, tiny) no formato usado pelo RenditionSelector"""
+        return [
+            {
+                "nome": nome,
+                "url": arquivo.get('url'),
+                "largura": arquivo.get('width'),
+                "altura": arquivo.get('height'),
+                "tamanho": arquivo.get('size'),
+            }
+            for nome, arquivo in video['videos'].items()
+            if arquivo.get('url')
+        ]
+
+    def baixar_arquivo(self, url, destino, progresso=None):
+        return self.downloader.baixar(url, destino, progresso=progresso)
+
+    def _buscar_json(self, url, params, mensagem_erro):
+        response = self.http.get(url, params=params)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            print(mensagem_erro, response.status_code, response.text)
+            return None
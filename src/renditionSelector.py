@@ -0,0 +1,58 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RENDITION_QUALITY_FLOOR = float(os.getenv("RENDITION_QUALITY_FLOOR", "1.0"))
+
+class RenditionSelector:
+    """
+    Escolhe qual versão (rendição) de um vídeo de stock baixar.
+
+    Cada rendição é um dicionário {"nome", "url", "largura", "altura", "tamanho"}.
+    Como o criar_video redimensiona o clipe para cobrir a tela e corta o excesso,
+    a escala necessária é max(largura_tela / largura, altura_tela / altura), o que
+    já leva a orientação em conta. É escolhida a menor rendição que cobre a tela,
+    aceitando uma ampliação de até 1 / qualidade_minima.
+    """
+
+    def __init__(self, largura_tela=1080, altura_tela=1920, qualidade_minima=RENDITION_QUALITY_FLOOR):
+        """
+        :param largura_tela: Largura do vídeo final.
+        :param altura_tela: Altura do vídeo final.
+        :param qualidade_minima: Fração mínima da resolução necessária (1.0 = nunca ampliar).
+        """
+        self.largura_tela = largura_tela
+        self.altura_tela = altura_tela
+        self.qualidade_minima = qualidade_minima
+
+    def escala_necessaria(self, rendicao):
+        return max(self.largura_tela / rendicao["largura"], self.altura_tela / rendicao["altura"])
+
+    def selecionar(self, rendicoes):
+        """Retorna a rendição escolhida, ou None se não houver nenhuma utilizável"""
+        validas = [r for r in rendicoes if r.get("url") and r.get("largura") and r.get("altura")]
+        if not validas:
+            return None
+
+        escala_maxima = 1.0 / self.qualidade_minima
+        cobrem = [r for r in validas if self.escala_necessaria(r) <= escala_maxima + 1e-6]
+        if cobrem:
+            return min(cobrem, key=self._custo)
+
+        # Nenhuma cobre a tela: usa a de maior resolução disponível
+        return max(validas, key=lambda r: r["largura"] * r["altura"])
+
+    @staticmethod
+    def _custo(rendicao):
+        return rendicao.get("tamanho") or rendicao["largura"] * rendicao["altura"]
+
+def orientacao(rendicao):
+    """portrait, landscape ou square a partir das dimensões de uma rendição"""
+    if not rendicao or not rendicao.get('largura') or not rendicao.get('altura'):
+        return None
+    if rendicao['altura'] > rendicao['largura']:
+        return "portrait"
+    if rendicao['largura'] > rendicao['altura']:
+        return "landscape"
+    return "square"
@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_RECORD_DIR = os.getenv("HTTP_RECORD_DIR")
+HTTP_REPLAY_URL = os.getenv("HTTP_REPLAY_URL")
+
+class Cassete:
+    """
+    Trocas HTTP gravadas em disco.
+
+    `index.jsonl` guarda uma linha por resposta (método, URL, status, cabeçalhos
+    e o arquivo do corpo) e os corpos ficam em `corpos/`, endereçados pelo
+    sha256, para que as mídias grandes não entrem no índice. Parâmetros de
+    autenticação (key, client_id, token) são removidos da URL antes de gravar.
+    """
+
+    PARAMETROS_IGNORADOS = {"key", "client_id", "token", "access_token"}
+    CABECALHOS_IGNORADOS = {"content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.indice = os.path.join(diretorio, "index.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(diretorio, "corpos"), exist_ok=True)
+
+    def gravar(self, metodo, url, status, cabecalhos, corpo):
+        resumo = hashlib.sha256(corpo).hexdigest()
+        caminho = os.path.join(self.diretorio, "corpos", resumo)
+        registro = {
+            "metodo": metodo.upper(),
+            "url": self.normalizar_url(url),
+            "status": status,
+            "cabecalhos": {nome: valor for nome, valor in cabecalhos.items() if nome.lower() not in self.CABECALHOS_IGNORADOS},
+            "corpo": resumo,
+        }
+        with self._lock:
+            if not os.path.exists(caminho):
+                with open(caminho + ".tmp", "wb") as arquivo:
+                    arquivo.write(corpo)
+                os.replace(caminho + ".tmp", caminho)
+            with open(self.indice, "a", encoding="utf-8") as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def carregar(self):
+        """Retorna {(método, url normalizada): [registros na ordem gravada]}"""
+        respostas = {}
+        if not os.path.exists(self.indice):
+            return respostas
+        with open(self.indice, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    respostas.setdefault((registro["metodo"], registro["url"]), []).append(registro)
+        return respostas
+
+    def ler_corpo(self, registro):
+        with open(os.path.join(self.diretorio, "corpos", registro["corpo"]), "rb") as arquivo:
+            return arquivo.read()
+
+    @classmethod
+    def normalizar_url(cls, url):
+        partes = urlsplit(url)
+        params = sorted((nome, valor) for nome, valor in parse_qsl(partes.query, keep_blank_values=True)
+                        if nome not in cls.PARAMETROS_IGNORADOS)
+        # Sem o esquema: no replay, `/host/caminho` não diz se a original era http ou https
+        return urlunsplit(("", partes.netloc, partes.path, urlencode(params), ""))
+
+class AdaptadorGravacao(HTTPAdapter):
+    """HTTPAdapter do requests que grava cada resposta recebida em uma Cassete"""
+
+    def __init__(self, cassete, **kwargs):
+        self.cassete = cassete
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        resposta = super().send(request, **kwargs)
+        if resposta.status_code == 206:
+            return resposta  # Trechos não são gravados: o servidor gera os Range a partir da resposta completa
+        # Lê o corpo inteiro; iter_content continua funcionando a partir do conteúdo já lido
+        self.cassete.gravar(request.method, request.url, resposta.status_code, resposta.headers, resposta.content)
+        return resposta
+
+class HttpGravacao:
+    """
+    Envolve um objeto httplib2 (ex.: o AuthorizedHttp do googleapiclient) gravando
+    as respostas em uma Cassete; os demais atributos são repassados ao original.
+    """
+
+    def __init__(self, http, cassete):
+        self._http = http
+        self._cassete = cassete
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        resposta, conteudo = self._http.request(uri, method, body, headers, *args, **kwargs)
+        self._cassete.gravar(method, uri, resposta.status, dict(resposta), conteudo or b"")
+        return resposta, conteudo
+
+    def __getattr__(self, nome):
+        return getattr(self._http, nome)
+
+class HttpReplay:
+    """Envolve um objeto httplib2 redirecionando todas as requisições ao ServidorReplay"""
+
+    def __init__(self, http, base=None):
+        self._http = http
+        self._base = base or HTTP_REPLAY_URL
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        return self._http.request(url_replay(uri, self._base), method, body, headers, *args, **kwargs)
+
+    def __getattr__(self, nome):
+        return getattr(self._http, nome)
+
+def url_replay(url, base=None):
+    """
+    Reescreve `https://host/caminho?q` para `{base}/host/caminho?q` quando há um
+    ServidorReplay configurado (HTTP_REPLAY_URL); caso contrário, retorna a URL.
+    """
+    base = (base or HTTP_REPLAY_URL or "").rstrip("/")
+    if not base or url.startswith(base + "/"):
+        return url
+    partes = urlsplit(url)
+    return f"{base}/{partes.netloc}{partes.path}" + (f"?{partes.query}" if partes.query else "")
+
+class ServidorReplay:
+    """
+    Servidor HTTP local que responde com as trocas de uma Cassete.
+
+    A requisição `/host/caminho?q` é respondida com a gravação de
+    `http(s)://host/caminho?q` (gravações repetidas da mesma URL são servidas em
+    rodízio). Permite simular latência, banda limitada e erros aleatórios, e
+    atende requisições Range, então downloads retomados e o ffmpeg funcionam.
+    Cabeçalhos Location absolutos são reescritos para continuar no servidor.
+    """
+
+    def __init__(self, cassete, host="127.0.0.1", porta=0, latencia=0.0, largura_banda=None, taxa_erro=0.0, status_erro=503):
+        """
+        :param cassete: Cassete (ou pasta de uma) com as respostas gravadas.
+        :param host: Endereço de escuta.
+        :param porta: Porta de escuta (0 = qualquer porta livre).
+        :param latencia: Atraso (segundos) antes de cada resposta.
+        :param largura_banda: Limite de bytes por segundo de cada resposta (None = sem limite).
+        :param taxa_erro: Probabilidade de responder `status_erro` no lugar da gravação.
+        :param status_erro: Status HTTP dos erros injetados.
+        """
+        self.cassete = cassete if isinstance(cassete, Cassete) else Cassete(cassete)
+        self.latencia = latencia
+        self.largura_banda = largura_banda
+        self.taxa_erro = taxa_erro
+        self.status_erro = status_erro
+        self.requisicoes = 0
+        self.erros_injetados = 0
+        self.nao_encontradas = 0
+        self._respostas = self.cassete.carregar()
+        self._proximas = {}
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer((host, porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def servir(self):
+        """Atende requisições na thread atual até ser interrompido"""
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo, valor, traceback):
+        self.parar()
+
+    def _buscar(self, metodo, caminho):
+        host, _, resto = caminho.lstrip("/").partition("/")
+        chave = (metodo, Cassete.normalizar_url(f"//{host}/{resto}"))
+        with self._lock:
+            self.requisicoes += 1
+            registros = self._respostas.get(chave)
+            if not registros and metodo == "HEAD":
+                registros = self._respostas.get(("GET", chave[1]))
+            if not registros:
+                self.nao_encontradas += 1
+                return None
+            posicao = self._proximas.get(chave, 0)
+            self._proximas[chave] = posicao + 1
+            return registros[posicao % len(registros)]
+
+    def _injetar_erro(self):
+        if self.taxa_erro and random.random() < self.taxa_erro:
+            with self._lock:
+                self.erros_injetados += 1
+            return True
+        return False
+
+    def _criar_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._responder()
+
+            def do_HEAD(self):
+                self._responder(corpo_no_envio=False)
+
+            def do_POST(self):
+                self._responder()
+
+            def do_PUT(self):
+                self._responder()
+
+            def _responder(self, corpo_no_envio=True):
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                if tamanho:
+                    self.rfile.read(tamanho)
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+
+                if servidor._injetar_erro():
+                    self._enviar(servidor.status_erro, {"Retry-After": "0"}, b"", corpo_no_envio)
+                    return
+                registro = servidor._buscar(self.command, self.path)
+                if registro is None:
+                    self._enviar(404, {"Content-Type": "text/plain"}, b"not recorded", corpo_no_envio)
+                    return
+
+                corpo = servidor.cassete.ler_corpo(registro)
+                cabecalhos = dict(registro["cabecalhos"])
+                if "Location" in cabecalhos or "location" in cabecalhos:
+                    nome = "Location" if "Location" in cabecalhos else "location"
+                    # Redirecionamentos relativos (/arquivo.mp4) são resolvidos contra a URL gravada
+                    destino = urljoin("http:" + registro["url"], cabecalhos[nome])
+                    cabecalhos[nome] = url_replay(destino, servidor.url)
+                status = registro["status"]
+                intervalo = self._intervalo(len(corpo)) if status == 200 else None
+                if intervalo:
+                    inicio, fim = intervalo
+                    cabecalhos["Content-Range"] = f"bytes {inicio}-{fim}/{len(corpo)}"
+                    corpo = corpo[inicio:fim + 1]
+                    status = 206
+                cabecalhos["Accept-Ranges"] = "bytes"
+                self._enviar(status, cabecalhos, corpo, corpo_no_envio)
+
+            def _intervalo(self, total):
+                valor = self.headers.get("Range", "")
+                if not valor.startswith("bytes=") or "," in valor:
+                    return None
+                inicio, _, fim = valor[len("bytes="):].partition("-")
+                if not inicio:
+                    inicio, fim = max(0, total - int(fim)), total - 1
+                else:
+                    inicio, fim = int(inicio), min(int(fim), total - 1) if fim else total - 1
+                if inicio >= total:
+                    return None
+                return inicio, fim
+
+            def _enviar(self, status, cabecalhos, corpo, corpo_no_envio):
+                self.send_response(status)
+                for nome, valor in cabecalhos.items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                if not corpo_no_envio:
+                    return
+                bloco = 64 * 1024
+                for posicao in range(0, len(corpo), bloco):
+                    parte = corpo[posicao:posicao + bloco]
+                    try:
+                        self.wfile.write(parte)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    if servidor.largura_banda:
+                        time.sleep(len(parte) / servidor.largura_banda)
+
+            def log_message(self, formato, *args):
+                pass
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve uma cassete HTTP gravada (HTTP_RECORD_DIR) localmente.")
+    parser.add_argument("cassete", help="Pasta da cassete gravada")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso por resposta, em segundos")
+    parser.add_argument("--banda", type=float, default=None, help="Limite de bytes por segundo por resposta")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Probabilidade de responder com erro")
+    parser.add_argument("--status-erro", type=int, default=503)
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(args.cassete, host=args.host, porta=args.porta, latencia=args.latencia,
+                              largura_banda=args.banda, taxa_erro=args.taxa_erro, status_erro=args.status_erro)
+    print(f"Servindo {args.cassete} em {servidor.url} (use HTTP_REPLAY_URL={servidor.url})")
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        sys.exit(0)
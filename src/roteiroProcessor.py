@@ -1,45 +1,51 @@
 import os
+import json
+import hashlib
 import unicodedata
 
 class RoteiroProcessor:
-    def __init__(self, input_path):
+    """
+    Divide o lote de roteiros (roteiro.txt) em um arquivo por TEMA.
+
+    O lote é lido linha a linha e cada roteiro é gravado assim que termina, sem
+    carregar o arquivo inteiro. O sha256 de cada roteiro exportado fica em um
+    índice, então numa nova execução os roteiros que não mudaram (e cujo
+    arquivo continua lá, intocado) não são regravados.
+    """
+
+    def __init__(self, input_path, indice=os.path.join("cache", "roteiros.json")):
+        """
+        :param input_path: Arquivo com o lote de roteiros.
+        :param indice: Hash e estado dos arquivos da última exportação (fora da pasta de roteiros).
+        """
         self.input_path = input_path
+        self.indice = indice
         self.roteiros = []
+        self.exportados = 0
+        self.inalterados = 0
         
     def processar(self):
-        """Método principal para executar todo o processamento"""
-        conteudo = self._ler_arquivo()
-        self.roteiros = self._dividir_roteiros(conteudo)
-                
-    def _ler_arquivo(self):
-        """Lê o conteúdo do arquivo de entrada, removendo asteriscos"""
-        with open(self.input_path, 'r', encoding='utf-8') as arquivo:
-            conteudo = arquivo.read()
-            # Remove todos os asteriscos do conteúdo
-            conteudo_sem_asteriscos = conteudo.replace('*', '')
-            return conteudo_sem_asteriscos
-            
-    def _dividir_roteiros(self, conteudo):
-        """Divide o conteúdo em roteiros individuais baseado em 'TEMA:'"""
-        roteiros = []
+        """Carrega todos os roteiros em self.roteiros (o exportar não precisa disso)"""
+        self.roteiros = list(self.iterar_roteiros())
+
+    def iterar_roteiros(self):
+        """Gera os roteiros um a um, lendo o lote linha a linha e removendo os asteriscos"""
         bloco_atual = []
-        
-        for linha in conteudo.split('\n'):
-            if linha.startswith('TEMA: '):
-                if bloco_atual:  # Se já temos um bloco em andamento
-                    roteiros.append('\n'.join(bloco_atual))
-                    bloco_atual = []
-                bloco_atual.append(linha)
-            else:
-                if bloco_atual:  # Só adiciona se já tivermos um TEMA
+        with open(self.input_path, 'r', encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                linha = linha.rstrip('\n').replace('*', '')
+                if linha.startswith('TEMA: '):
+                    if bloco_atual:  # Se já temos um bloco em andamento
+                        yield '\n'.join(bloco_atual)
+                        bloco_atual = []
                     bloco_atual.append(linha)
-        
-        # Adiciona o último bloco
+                elif bloco_atual:  # Só adiciona se já tivermos um TEMA
+                    bloco_atual.append(linha)
+
+        # O último bloco
         if bloco_atual:
-            roteiros.append('\n'.join(bloco_atual))
+            yield '\n'.join(bloco_atual)
             
-        return roteiros
-    
     def _gerar_nome_arquivo(self, conteudo_roteiro):
         """Gera o nome do arquivo baseado no tema do roteiro"""
         for linha in conteudo_roteiro.split('\n'):
@@ -64,16 +70,63 @@ class RoteiroProcessor:
     
     def exportar(self, output_dir='scripts'):
         """
-        Exporta os roteiros para arquivos individuais
+        Exporta os roteiros para arquivos individuais, pulando os que não mudaram
         :param output_dir: Diretório de saída (padrão: scripts)
+        :return: Quantidade de arquivos gravados
         """
         os.makedirs(output_dir, exist_ok=True)
-        for roteiro in self.roteiros:
+        # Temporários que sobraram de uma exportação interrompida antes do os.replace
+        for nome in os.listdir(output_dir):
+            if nome.endswith('.txt.tmp'):
+                os.remove(os.path.join(output_dir, nome))
+        indice = self._carregar_indice()
+        self.exportados = 0
+        self.inalterados = 0
+        for roteiro in self.iterar_roteiros():
             nome_arquivo = self._gerar_nome_arquivo(roteiro)
             caminho_completo = os.path.join(output_dir, nome_arquivo)
-            with open(caminho_completo, 'w', encoding='utf-8') as arquivo:
-                print(f"Roteiro criado: {caminho_completo}")
-                arquivo.write(roteiro)
+            conteudo = roteiro.encode('utf-8')
+            hash_roteiro = hashlib.sha256(conteudo).hexdigest()
+            chave = os.path.abspath(caminho_completo)
+
+            if indice.get(chave) == [hash_roteiro] + self._estado(caminho_completo):
+                self.inalterados += 1
+                continue
+
+            # Grava em um temporário e troca, para nunca deixar um roteiro pela metade
+            with open(caminho_completo + '.tmp', 'wb') as arquivo:
+                arquivo.write(conteudo)
+            os.replace(caminho_completo + '.tmp', caminho_completo)
+            indice[chave] = [hash_roteiro] + self._estado(caminho_completo)
+            self.exportados += 1
+            print(f"Roteiro criado: {caminho_completo}")
+
+        self._salvar_indice(indice)
+        if self.inalterados:
+            print(f"{self.inalterados} roteiros inalterados desde a última exportação")
+        return self.exportados
+
+    @staticmethod
+    def _estado(caminho):
+        """Tamanho e mtime do arquivo exportado, para notar se ele foi editado ou removido depois"""
+        try:
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            return [None, None]
+        return [estado.st_size, estado.st_mtime_ns]
+
+    def _carregar_indice(self):
+        try:
+            with open(self.indice, 'r', encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _salvar_indice(self, indice):
+        os.makedirs(os.path.dirname(self.indice) or '.', exist_ok=True)
+        with open(self.indice + '.tmp', 'w', encoding='utf-8') as arquivo:
+            json.dump(indice, arquivo)
+        os.replace(self.indice + '.tmp', self.indice)
 
     def deletar_arquivo_original(self):
         """Remove o arquivo fonte original após o processamento"""
@@ -89,8 +142,7 @@ class RoteiroProcessor:
 # Exemplo de uso
 if __name__ == "__main__":
     processor = RoteiroProcessor(os.path.join("scripts", "roteiro.txt"))
-    processor.processar()
-    processor.exportar("scripts")
+    exportados = processor.exportar("scripts")
     processor.deletar_arquivo_original()
     
-    print(f"Foram criados {len(processor.roteiros)} arquivos com sucesso!")
\ No newline at end of file
+    print(f"Foram criados {exportados} arquivos com sucesso!")
\ No newline at end of file
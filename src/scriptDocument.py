@@ -0,0 +1,76 @@
+import os
+
+class ScriptDocument:
+    """
+    Um roteiro já interpretado, lido do disco uma única vez e repassado a todas as etapas.
+
+    Os campos de cabeçalho (TEMA:, TÍTULO:, HASHTAGS:, SEARCH:, MUSIC:) guardam o
+    valor da primeira linha que começa com o prefixo. Cada linha numerada da
+    narração vira (narracao_id, texto, partes), com as partes divididas nas
+    vírgulas como (parte_id, texto). As partes vazias são descartadas mas
+    mantêm a numeração, então o arquivo narracao_{id}_{parte}.* gerado pelo TTS
+    e a legenda da mesma parte sempre usam o mesmo par de IDs.
+    """
+
+    __slots__ = ("caminho", "tema", "titulo", "hashtags", "busca", "musica", "narracoes")
+
+    CAMPOS = {
+        "TEMA:": "tema",
+        "TÍTULO:": "titulo",
+        "HASHTAGS:": "hashtags",
+        "SEARCH:": "busca",
+        "MUSIC:": "musica",
+    }
+
+    def __init__(self, caminho=None, tema=None, titulo=None, hashtags=None, busca=None, musica=None, narracoes=()):
+        self.caminho = caminho
+        self.tema = tema
+        self.titulo = titulo
+        self.hashtags = hashtags
+        self.busca = busca
+        self.musica = musica
+        self.narracoes = narracoes
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê e interpreta o arquivo de roteiro"""
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return cls.interpretar(arquivo.read(), caminho)
+
+    @classmethod
+    def interpretar(cls, conteudo, caminho=None):
+        """Interpreta o texto de um roteiro"""
+        documento = cls(caminho)
+        narracoes = []
+        for linha in conteudo.splitlines():
+            for prefixo, campo in cls.CAMPOS.items():
+                if linha.startswith(prefixo) and getattr(documento, campo) is None:
+                    setattr(documento, campo, linha.split(prefixo, 1)[1].strip())
+
+            linha = linha.strip()
+            if linha.startswith("NARRACAO:") or not (linha and linha[0].isdigit() and ". " in linha):
+                continue
+            texto = linha.split(". ", 1)[1]
+            partes = tuple(
+                (parte_id, parte.strip())
+                for parte_id, parte in enumerate(texto.split(","), start=1)
+                if parte.strip()
+            )
+            narracoes.append((len(narracoes) + 1, texto, partes))
+        documento.narracoes = tuple(narracoes)
+        return documento
+
+    def partes(self):
+        """Todas as partes da narração, na ordem do roteiro, como (narracao_id, parte_id, texto)"""
+        return [(narracao_id, parte_id, texto)
+                for narracao_id, _, partes in self.narracoes
+                for parte_id, texto in partes]
+
+    def __repr__(self):
+        return f"ScriptDocument({os.path.basename(self.caminho or '')!r}, {len(self.narracoes)} narrações, {len(self.partes())} partes)"
+
+def carregar_documento(roteiro):
+    """Aceita um ScriptDocument já interpretado ou o caminho de um roteiro"""
+    if isinstance(roteiro, ScriptDocument):
+        return roteiro
+    return ScriptDocument.carregar(roteiro)
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join("cache", "search.sqlite"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+
+# TTL padrão por provedor; cada um pode ser trocado com SEARCH_CACHE_TTL_<PROVEDOR> (ex.: SEARCH_CACHE_TTL_PEXELS)
+TTLS_PROVEDORES = {
+    "pexels": 24 * 3600,
+    "pixabay": 24 * 3600,
+    "freesound": 7 * 24 * 3600,
+    "jamendo": 7 * 24 * 3600,
+}
+
+def ttls_configurados(padroes=TTLS_PROVEDORES):
+    """TTLs por provedor, com os valores de SEARCH_CACHE_TTL_<PROVEDOR> no lugar dos padrões"""
+    return {
+        provedor: int(os.getenv(f"SEARCH_CACHE_TTL_{provedor.upper()}") or ttl)
+        for provedor, ttl in padroes.items()
+    }
+
+class SearchCache:
+    """
+    Cache em disco (SQLite) das respostas de busca dos provedores.
+
+    A chave é (provedor, endpoint, parâmetros normalizados); credenciais ficam fora
+    da chave. Cada provedor tem seu TTL. Uma resposta vencida, mas ainda dentro da
+    janela de stale, é devolvida imediatamente enquanto uma nova busca é feita em
+    segundo plano (stale-while-revalidate).
+    """
+
+    PARAMETROS_IGNORADOS = {"key", "client_id", "token"}
+    PARAMETROS_TEXTO = {"q", "query", "search"}
+
+    def __init__(self, caminho=SEARCH_CACHE_PATH, ttls=None, ttl_padrao=SEARCH_CACHE_TTL, janela_stale=7 * 24 * 3600):
+        """
+        :param caminho: Arquivo SQLite do cache.
+        :param ttls: Dicionário {provedor: segundos} com TTLs específicos.
+        :param ttl_padrao: TTL dos provedores sem valor específico.
+        :param janela_stale: Por quanto tempo após o TTL a resposta ainda pode ser servida.
+        """
+        self.caminho = caminho
+        self.ttls = ttls or {}
+        self.ttl_padrao = ttl_padrao
+        self.janela_stale = janela_stale
+        self.acertos = 0
+        self.acertos_stale = 0
+        self.falhas = 0
+        self._revalidando = set()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS respostas ("
+                " chave TEXT PRIMARY KEY, provedor TEXT, endpoint TEXT, params TEXT,"
+                " payload TEXT, criado REAL)"
+            )
+
+    def obter(self, provedor, endpoint, params, buscar):
+        """
+        Retorna a resposta em cache ou chama `buscar()` e guarda o resultado.
+
+        `buscar` deve devolver o JSON da resposta, ou None em caso de erro (que não é guardado).
+        """
+        params_normalizados = self._normalizar(params)
+        chave = hashlib.sha256(f"{provedor}|{endpoint}|{params_normalizados}".encode("utf-8")).hexdigest()
+
+        with closing(self._conectar()) as conexao:
+            linha = conexao.execute("SELECT payload, criado FROM respostas WHERE chave = ?", (chave,)).fetchone()
+
+        if linha is not None:
+            payload, criado = linha
+            idade = time.time() - criado
+            ttl = self.ttls.get(provedor, self.ttl_padrao)
+            if idade <= ttl:
+                with self._lock:
+                    self.acertos += 1
+                return json.loads(payload)
+            if idade <= ttl + self.janela_stale:
+                with self._lock:
+                    self.acertos_stale += 1
+                self._revalidar(chave, provedor, endpoint, params_normalizados, buscar)
+                return json.loads(payload)
+
+        with self._lock:
+            self.falhas += 1
+        dados = buscar()
+        if dados is not None:
+            self._gravar(chave, provedor, endpoint, params_normalizados, dados)
+        return dados
+
+    def estatisticas(self):
+        with self._lock:
+            return {"acertos": self.acertos, "acertos_stale": self.acertos_stale, "falhas": self.falhas}
+
+    def _revalidar(self, chave, provedor, endpoint, params_normalizados, buscar):
+        """Atualiza a entrada em segundo plano (uma revalidação por chave de cada vez)"""
+        with self._lock:
+            if chave in self._revalidando:
+                return
+            self._revalidando.add(chave)
+
+        def tarefa():
+            try:
+                dados = buscar()
+                if dados is not None:
+                    self._gravar(chave, provedor, endpoint, params_normalizados, dados)
+            except Exception as e:
+                print(f"Erro ao revalidar busca em cache ({provedor} {endpoint}): {e}")
+            finally:
+                with self._lock:
+                    self._revalidando.discard(chave)
+
+        threading.Thread(target=tarefa, daemon=True).start()
+
+    def _gravar(self, chave, provedor, endpoint, params_normalizados, dados):
+        with closing(self._conectar()) as conexao, conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, provedor, endpoint, params_normalizados, json.dumps(dados), time.time()),
+            )
+
+    def _normalizar(self, params):
+        normalizados = {}
+        for nome, valor in params.items():
+            if nome in self.PARAMETROS_IGNORADOS or valor is None:
+                continue
+            if nome in self.PARAMETROS_TEXTO and isinstance(valor, str):
+                valor = " ".join(valor.lower().split())
+            normalizados[nome] = str(valor)
+        return json.dumps(normalizados, sort_keys=True, ensure_ascii=False)
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30)
+
+_cache_compartilhado = None
+_cache_lock = threading.Lock()
+
+def obter_cache_busca():
+    """Retorna o cache de buscas compartilhado pelo processo"""
+    global _cache_compartilhado
+    with _cache_lock:
+        if _cache_compartilhado is None:
+            _cache_compartilhado = SearchCache(ttls=ttls_configurados())
+        return _cache_compartilhado
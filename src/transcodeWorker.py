@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from src.ffmpegTools import executar_ffmpeg
+
+load_dotenv()
+
+# Transcodificações simultâneas no processo inteiro; sem valor, metade dos núcleos dividida entre os renders
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS") or 0)
+
+class TranscodeWorker:
+    """
+    Normaliza os clipes em segundo plano, à medida que cada download termina.
+
+    Cada clipe vira um segmento "mezanino" já no formato do vídeo final: 1080x1920
+    (escala para cobrir a tela e corte central, como o criar_video faz), 24 fps,
+    H.264/AAC e apenas os segundos que serão usados. Os arquivos ficam em
+    `diretorio_saida` com o mesmo nome do original, e o criar_video os prefere
+    quando existem, pulando o redimensionamento quadro a quadro no moviepy.
+
+    Todas as instâncias usam o mesmo pool de encoders (obter_executor_transcodificacao),
+    então vários workers de ingestão não multiplicam os processos do x264.
+    """
+
+    def __init__(self, diretorio_saida, largura=1080, altura=1920, fps=24, executor=None, timeout=600):
+        """
+        :param diretorio_saida: Pasta dos clipes normalizados.
+        :param largura: Largura do vídeo final.
+        :param altura: Altura do vídeo final.
+        :param fps: Quadros por segundo do vídeo final.
+        :param executor: Pool onde as transcodificações rodam (o compartilhado do processo por padrão).
+        :param timeout: Tempo máximo (segundos) de cada execução do ffmpeg.
+        """
+        self.diretorio_saida = diretorio_saida
+        self.largura = largura
+        self.altura = altura
+        self.fps = fps
+        self.timeout = timeout
+        self._executor = executor or obter_executor_transcodificacao()
+        self._futuros = []
+        self._lock = threading.Lock()
+        os.makedirs(diretorio_saida, exist_ok=True)
+
+    def enviar(self, origem, duracao=None):
+        """Agenda a normalização de `origem` e retorna o Future (True/False)"""
+        futuro = self._executor.submit(self.normalizar, origem, duracao)
+        with self._lock:
+            self._futuros.append(futuro)
+        return futuro
+
+    def aguardar(self):
+        """Espera as normalizações agendadas por esta instância e retorna quantas deram certo"""
+        with self._lock:
+            futuros, self._futuros = self._futuros, []
+        return sum(1 for futuro in futuros if futuro.result())
+
+    def normalizar(self, origem, duracao=None):
+        destino = os.path.join(self.diretorio_saida, os.path.basename(origem))
+        parcial = destino + ".part.mp4"
+        filtro = (f"scale={self.largura}:{self.altura}:force_original_aspect_ratio=increase,"
+                  f"crop={self.largura}:{self.altura},setsar=1,fps={self.fps}")
+        argumentos = ["-i", origem]
+        if duracao:
+            argumentos += ["-t", str(duracao)]
+        argumentos += [
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", filtro,
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-ar", "44100",
+            "-movflags", "+faststart",
+            "-f", "mp4", parcial,
+        ]
+        sucesso, erro = executar_ffmpeg(argumentos, timeout=self.timeout)
+        if not sucesso or not os.path.exists(parcial):
+            print(f"Erro ao normalizar {origem}: {erro}")
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            return False
+
+        os.replace(parcial, destino)
+        print(f"🎞️ Clipe normalizado: {destino}")
+        return True
+
+def caminho_normalizado(diretorio, nome):
+    """Caminho do clipe normalizado, se ele e o original existirem e ele for o mais novo"""
+    original = os.path.join(diretorio, nome)
+    normalizado = os.path.join(diretorio, "normalizados", nome)
+    if not os.path.exists(normalizado) or not os.path.exists(original):
+        return None
+    if os.path.getmtime(normalizado) < os.path.getmtime(original):
+        return None  # Sobra de um vídeo anterior no mesmo slot
+    return normalizado
+
+_executor_compartilhado = None
+_executor_lock = threading.Lock()
+
+def obter_executor_transcodificacao(processos_render=1):
+    """
+    Retorna o pool de transcodificação compartilhado pelo processo. Na primeira
+    chamada ele é criado com TRANSCODE_WORKERS workers ou, sem esse valor, com a
+    metade dos núcleos dividida entre os `processos_render` renders simultâneos.
+    """
+    global _executor_compartilhado
+    with _executor_lock:
+        if _executor_compartilhado is None:
+            max_workers = TRANSCODE_WORKERS or max(1, (os.cpu_count() or 2) // 2 // max(1, processos_render))
+            _executor_compartilhado = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcode")
+        return _executor_compartilhado
@@ -0,0 +1,255 @@
+import os
+import io
+import time
+import wave
+import shutil
+import zlib
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from collections import namedtuple
+from xml.sax.saxutils import escape
+from dotenv import load_dotenv
+from src.ttsScheduler import AgendadorTTS
+from src.narrationStorage import NARRATION_FORMAT
+
+load_dotenv()
+
+TTS_BACKEND = os.getenv("TTS_BACKEND") or "google"  # google, espeak ou fake
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))  # Sínteses simultâneas no início (o AgendadorTTS ajusta)
+ESPEAK_BINARY = os.getenv("ESPEAK_BINARY")
+SSML_MAX_BYTES = 5000  # Limite de entrada do synthesize_speech
+
+ParametrosWav = namedtuple("ParametrosWav", "nchannels sampwidth framerate nframes comptype compname")
+
+# Cada backend expõe:
+#   nome, configuracao (entra na chave do CacheTTS), concorrencia_maxima
+#   sintetizar(texto, idioma, voz) -> bytes de um WAV (ou Ogg Opus, se o backend já entregar comprimido)
+#   sintetizar_partes(textos, idioma, voz) -> (parâmetros WAV, [PCM de cada texto]) ou None
+#   testar() -> mensagem de erro ou None
+#   estatisticas() -> dicionário ou None
+
+class BackendGoogle:
+    """Google Cloud TTS: um cliente por instância, chamadas pelo AgendadorTTS e lote por SSML com <mark>"""
+
+    nome = "google"
+
+    # Configuração de áudio de todas as sínteses
+    AUDIO_CONFIG = {
+        "audio_encoding": "LINEAR16",
+        "effects_profile_id": ["small-bluetooth-speaker-class-device"],
+        "speaking_rate": 1.0,
+        "pitch": 0.5,
+    }
+
+    def __init__(self, api_key=None, agendador=None, formato=NARRATION_FORMAT):
+        """
+        :param api_key: Chave da API (GOOGLE_API_KEY por padrão).
+        :param agendador: AgendadorTTS usado em todas as chamadas.
+        :param formato: wav (LINEAR16) ou ogg (a API já devolve OGG_OPUS, sem recodificar aqui).
+        """
+        # Importados só aqui: os outros backends não dependem das bibliotecas do Google
+        from google.api_core import exceptions as google_exceptions
+        from google.cloud import texttospeech_v1 as texttospeech
+        from google.cloud import texttospeech_v1beta1 as texttospeech_beta  # Timepoints de <mark> no SSML
+        self.texttospeech = texttospeech
+        self.texttospeech_beta = texttospeech_beta
+
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        # Cota, retentativas e concorrência adaptativa de todas as chamadas ao TTS
+        self.agendador = agendador or AgendadorTTS(concorrencia_inicial=TTS_WORKERS, retentaveis=(
+            google_exceptions.ResourceExhausted,
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.DeadlineExceeded,
+        ))
+        self.configuracao = dict(self.AUDIO_CONFIG, audio_encoding="OGG_OPUS" if formato == "ogg" else "LINEAR16")
+        self.concorrencia_maxima = self.agendador.concorrencia_maxima
+        self._client = None
+        self._client_beta = None
+        self._client_lock = threading.Lock()
+
+    def cliente(self):
+        """Cria o TextToSpeechClient (um canal gRPC) uma única vez e o reutiliza em todas as sínteses"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = self.texttospeech.TextToSpeechClient(
+                    client_options={"api_key": self.api_key}
+                )
+            return self._client
+
+    def cliente_beta(self):
+        """Cliente v1beta1, usado só na síntese em lote por SSML (timepoints)"""
+        with self._client_lock:
+            if self._client_beta is None:
+                self._client_beta = self.texttospeech_beta.TextToSpeechClient(
+                    client_options={"api_key": self.api_key}
+                )
+            return self._client_beta
+
+    def sintetizar(self, texto, idioma, voz):
+        texttospeech = self.texttospeech
+        response = self.agendador.executar(
+            self.cliente().synthesize_speech,
+            input=texttospeech.SynthesisInput(text=texto),
+            voice=texttospeech.VoiceSelectionParams(language_code=idioma, name=voz),
+            audio_config=self._audio_config(texttospeech),
+        )
+        return response.audio_content
+
+    def sintetizar_partes(self, textos, idioma, voz):
+        """Uma requisição SSML com um <mark> antes de cada texto; None se não der para usar os timepoints"""
+        ssml = "<speak>" + " ".join(
+            f'<mark name="p{posicao}"/>{escape(texto)}{"," if posicao < len(textos) - 1 else ""}'
+            for posicao, texto in enumerate(textos)
+        ) + "</speak>"
+        if len(ssml.encode("utf-8")) > SSML_MAX_BYTES:
+            return None
+
+        texttospeech_beta = self.texttospeech_beta
+        try:
+            response = self.agendador.executar(self.cliente_beta().synthesize_speech, request=texttospeech_beta.SynthesizeSpeechRequest(
+                input=texttospeech_beta.SynthesisInput(ssml=ssml),
+                voice=texttospeech_beta.VoiceSelectionParams(language_code=idioma, name=voz),
+                audio_config=self._audio_config(texttospeech_beta, "LINEAR16"),  # PCM para poder fatiar nos timepoints
+                enable_time_pointing=[texttospeech_beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
+            ))
+            marcas = {timepoint.mark_name: timepoint.time_seconds for timepoint in response.timepoints}
+            with wave.open(io.BytesIO(response.audio_content)) as entrada:
+                parametros = entrada.getparams()
+                quadros = entrada.readframes(entrada.getnframes())
+        except Exception as e:
+            print(f"❌ Erro na síntese em lote, gerando parte a parte: {e}")
+            return None
+        if any(f"p{posicao}" not in marcas for posicao in range(len(textos))):
+            print("⚠️ Resposta sem timepoints, gerando parte a parte.")
+            return None
+
+        # Cada parte vai do seu <mark> até o próximo; o silêncio inicial fica com a primeira
+        bytes_por_quadro = parametros.sampwidth * parametros.nchannels
+        total = len(quadros) // bytes_por_quadro
+        limites = [0] + [min(total, int(round(marcas[f"p{posicao}"] * parametros.framerate))) for posicao in range(1, len(textos))] + [total]
+        for posicao in range(1, len(limites)):
+            limites[posicao] = max(limites[posicao], limites[posicao - 1])
+        return parametros, [quadros[inicio * bytes_por_quadro:fim * bytes_por_quadro] for inicio, fim in zip(limites, limites[1:])]
+
+    def testar(self):
+        if not self.api_key:
+            return "GOOGLE_API_KEY não encontrada no arquivo .env."
+        return None
+
+    def estatisticas(self):
+        return self.agendador.estatisticas()
+
+    def _audio_config(self, modulo, encoding=None):
+        return modulo.AudioConfig(
+            audio_encoding=modulo.AudioEncoding[encoding or self.configuracao["audio_encoding"]],
+            effects_profile_id=self.configuracao["effects_profile_id"],
+            speaking_rate=self.configuracao["speaking_rate"],
+            pitch=self.configuracao["pitch"],
+        )
+
+class BackendEspeak:
+    """Síntese local com o espeak-ng: sem rede nem chave, qualidade de rascunho"""
+
+    nome = "espeak"
+
+    def __init__(self, binario=None, velocidade=165, max_workers=None):
+        """
+        :param binario: Executável do espeak-ng (ESPEAK_BINARY, espeak-ng ou espeak do PATH).
+        :param velocidade: Palavras por minuto.
+        :param max_workers: Sínteses simultâneas (um processo cada).
+        """
+        self.binario = binario or ESPEAK_BINARY or shutil.which("espeak-ng") or shutil.which("espeak") or "espeak-ng"
+        self.velocidade = velocidade
+        self.configuracao = {"velocidade": velocidade}
+        self.concorrencia_maxima = max_workers or os.cpu_count() or 4
+
+    def sintetizar(self, texto, idioma, voz):
+        # O espeak só usa o idioma; a voz do Google (ex.: pt-BR-Wavenet-A) não tem equivalente
+        descritor, caminho = tempfile.mkstemp(suffix=".wav")
+        os.close(descritor)
+        try:
+            subprocess.run([self.binario, "-v", idioma.lower(), "-s", str(self.velocidade), "-w", caminho, texto],
+                           check=True, capture_output=True, timeout=60)
+            with open(caminho, "rb") as arquivo:
+                return arquivo.read()
+        finally:
+            os.remove(caminho)
+
+    def sintetizar_partes(self, textos, idioma, voz):
+        return None
+
+    def testar(self):
+        if not shutil.which(self.binario) and not os.path.exists(self.binario):
+            return f"espeak-ng não encontrado ({self.binario})."
+        return None
+
+    def estatisticas(self):
+        return None
+
+class BackendFalso:
+    """
+    Backend determinístico para testes de carga e desenvolvimento offline.
+
+    Gera um tom por palavra (frequência derivada do texto) seguido de um
+    silêncio, com duração proporcional ao número de caracteres, então o mesmo
+    texto sempre produz o mesmo WAV. `latencia` simula o tempo de uma requisição
+    a uma API remota: é aplicada uma vez por chamada, inclusive no lote.
+    """
+
+    nome = "fake"
+
+    def __init__(self, taxa=24000, segundos_por_caractere=0.06, latencia=0.0, max_workers=16):
+        self.taxa = taxa
+        self.segundos_por_caractere = segundos_por_caractere
+        self.latencia = latencia
+        self.configuracao = {"taxa": taxa, "segundos_por_caractere": segundos_por_caractere}
+        self.concorrencia_maxima = max_workers
+
+    def sintetizar(self, texto, idioma, voz):
+        self._aguardar()
+        saida = io.BytesIO()
+        with wave.open(saida, "wb") as arquivo:
+            arquivo.setparams(self._parametros())
+            arquivo.writeframes(self._pcm(texto))
+        return saida.getvalue()
+
+    def sintetizar_partes(self, textos, idioma, voz):
+        self._aguardar()
+        return self._parametros(), [self._pcm(texto) for texto in textos]
+
+    def testar(self):
+        return None
+
+    def estatisticas(self):
+        return None
+
+    def _parametros(self):
+        return ParametrosWav(1, 2, self.taxa, 0, "NONE", "not compressed")
+
+    def _aguardar(self):
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def _pcm(self, texto):
+        blocos = []
+        for palavra in texto.split():
+            frequencia = 180 + zlib.crc32(palavra.encode("utf-8")) % 420
+            instantes = np.arange(int(self.taxa * self.segundos_por_caractere * len(palavra))) / self.taxa
+            blocos.append((np.sin(2 * np.pi * frequencia * instantes) * 8000).astype("<i2"))
+            blocos.append(np.zeros(int(self.taxa * self.segundos_por_caractere), dtype="<i2"))
+        return np.concatenate(blocos).tobytes() if blocos else b""
+
+BACKENDS = {
+    BackendGoogle.nome: BackendGoogle,
+    BackendEspeak.nome: BackendEspeak,
+    BackendFalso.nome: BackendFalso,
+}
+
+def criar_backend(nome=TTS_BACKEND):
+    """Instancia o backend de TTS pelo nome (google, espeak ou fake)"""
+    try:
+        return BACKENDS[nome.lower()]()
+    except KeyError:
+        raise ValueError(f"Backend de TTS desconhecido: {nome} (opções: {', '.join(BACKENDS)})")
@@ -0,0 +1,91 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from dotenv import load_dotenv
+from src.lruIndex import IndiceLRU
+from src.mediaCache import vincular_arquivo
+
+load_dotenv()
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "2048"))
+
+class CacheTTS:
+    """
+    Cache de áudios sintetizados, endereçado pelo conteúdo.
+
+    A chave é o sha256 de (texto, idioma, voz e configuração de áudio), então
+    qualquer roteiro que repita uma frase com a mesma voz reaproveita o áudio.
+    Cada entrada guarda o arquivo e a sua duração; o índice (IndiceLRU) é
+    mantido também em memória, para que um acerto seja só uma consulta a um
+    dicionário mais um hard link, sem decodificar o áudio. Acima do limite, as
+    entradas usadas há mais tempo são removidas.
+    """
+
+    def __init__(self, diretorio=TTS_CACHE_DIR, limite_bytes=int(TTS_CACHE_MAX_MB * 1024 ** 2)):
+        """
+        :param diretorio: Pasta dos áudios e do índice.
+        :param limite_bytes: Tamanho máximo do cache antes da remoção LRU.
+        """
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.indice = IndiceLRU(diretorio, "audios", {"duracao": "REAL"}, limite_bytes)
+        self.acertos = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+        self._entradas = {chave: (arquivo, duracao, tamanho) for chave, arquivo, tamanho, duracao in self.indice.entradas("duracao")}
+
+    @staticmethod
+    def chave(texto, idioma, nome_voz, configuracao):
+        """Hash do texto, idioma, voz e da configuração de áudio (encoding, speaking_rate, pitch, efeitos...)"""
+        conteudo = json.dumps([texto, idioma, nome_voz, configuracao], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def obter(self, chave, destino):
+        """Vincula o áudio em cache a `destino` e retorna sua duração, ou None se não estiver em cache"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+        arquivo, duracao, _ = entrada
+        try:
+            vincular_arquivo(os.path.join(self.diretorio, arquivo), destino)
+        except FileNotFoundError:
+            self._remover(chave)
+            return None
+        with self._lock:
+            self.acertos += 1
+        self.indice.registrar_acesso(chave)
+        return duracao
+
+    def guardar(self, chave, origem, duracao):
+        """Copia o áudio `origem` para o cache com a duração informada"""
+        arquivo = os.path.join(chave[:2], chave + os.path.splitext(origem)[1])
+        caminho = os.path.join(self.diretorio, arquivo)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        shutil.copyfile(origem, caminho + ".tmp")
+        os.replace(caminho + ".tmp", caminho)
+        tamanho = os.path.getsize(caminho)
+        with self._lock:
+            self._entradas[chave] = (arquivo, duracao, tamanho)
+        self.indice.inserir(chave, arquivo, tamanho, duracao=duracao)
+        removidas = self.indice.remover_excedente(manter=chave)
+        with self._lock:
+            for removida in removidas:
+                self._entradas.pop(removida, None)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "tamanho_total": sum(tamanho for _, _, tamanho in self._entradas.values()),
+            }
+
+    def _remover(self, chave):
+        with self._lock:
+            self._entradas.pop(chave, None)
+        self.indice.remover(chave)
@@ -0,0 +1,141 @@
+import os
+import time
+import random
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TTS_REQUESTS_PER_MINUTE = float(os.getenv("TTS_REQUESTS_PER_MINUTE", "900"))
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "16"))
+TTS_RETRIES = int(os.getenv("TTS_RETRIES", "6"))
+
+class AgendadorTTS:
+    """
+    Controla o ritmo das requisições ao Google TTS.
+
+    Um token bucket mantém a taxa abaixo da cota (requisições por minuto) e
+    as chamadas que falham com uma das exceções `retentaveis` (no Google:
+    RESOURCE_EXHAUSTED, UNAVAILABLE ou DEADLINE_EXCEEDED) são refeitas com
+    backoff exponencial e jitter. A
+    concorrência se ajusta sozinha (AIMD): sobe de um em um enquanto as
+    respostas chegam rápidas e sem erro e cai pela metade a cada erro de cota
+    ou quando a latência média passa de `latencia_alvo`.
+    """
+
+    def __init__(self, requisicoes_por_minuto=TTS_REQUESTS_PER_MINUTE, concorrencia_inicial=4, concorrencia_maxima=TTS_MAX_CONCURRENCY,
+                 tentativas=TTS_RETRIES, backoff=0.5, backoff_maximo=32.0, latencia_alvo=5.0, retentaveis=()):
+        """
+        :param requisicoes_por_minuto: Cota de requisições por minuto do projeto.
+        :param concorrencia_inicial: Requisições simultâneas no início.
+        :param concorrencia_maxima: Limite superior da concorrência adaptativa.
+        :param tentativas: Quantas vezes refazer uma requisição que falhou por cota/indisponibilidade.
+        :param backoff: Espera base (segundos) do backoff exponencial.
+        :param backoff_maximo: Espera máxima entre tentativas.
+        :param latencia_alvo: Latência média (segundos) acima da qual a concorrência é reduzida.
+        :param retentaveis: Tipos de exceção que indicam cota/indisponibilidade e valem uma nova tentativa.
+        """
+        self.taxa = requisicoes_por_minuto / 60
+        self.capacidade = max(1.0, self.taxa)  # Permite uma rajada de até um segundo de cota
+        self.concorrencia_maxima = concorrencia_maxima
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.backoff_maximo = backoff_maximo
+        self.latencia_alvo = latencia_alvo
+        self.retentaveis = tuple(retentaveis)
+        self.limite = max(1, min(concorrencia_inicial, concorrencia_maxima))
+        self.latencia_media = None
+        self.requisicoes = 0
+        self.retentativas = 0
+        self.falhas = 0
+        self._tokens = self.capacidade
+        self._ultimo_token = time.monotonic()
+        self._em_andamento = 0
+        self._sucessos = 0
+        self._ultima_reducao = 0.0
+        self._lock = threading.Lock()
+        self._vaga = threading.Condition(self._lock)
+
+    def executar(self, funcao, *args, **kwargs):
+        """Chama `funcao(*args, **kwargs)` respeitando a cota, a concorrência e a política de retentativas"""
+        for tentativa in range(self.tentativas + 1):
+            self._aguardar_token()
+            self._entrar()
+            inicio = time.monotonic()
+            try:
+                resultado = funcao(*args, **kwargs)
+            except self.retentaveis as e:
+                self._sair(erro=True)
+                if tentativa == self.tentativas:
+                    with self._lock:
+                        self.falhas += 1
+                    raise
+                espera = min(self.backoff_maximo, self.backoff * (2 ** tentativa))
+                espera = random.uniform(0, espera)  # Full jitter
+                print(f"⏳ TTS: {type(e).__name__}, nova tentativa em {espera:.1f}s (limite de concorrência {self.limite})")
+                with self._lock:
+                    self.retentativas += 1
+                time.sleep(espera)
+            except Exception:
+                self._sair()
+                with self._lock:
+                    self.falhas += 1
+                raise
+            else:
+                self._sair(latencia=time.monotonic() - inicio)
+                return resultado
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "requisicoes": self.requisicoes,
+                "retentativas": self.retentativas,
+                "falhas": self.falhas,
+                "concorrencia": self.limite,
+                "latencia_media": self.latencia_media or 0.0,
+            }
+
+    def _aguardar_token(self):
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo_token) * self.taxa)
+                self._ultimo_token = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+    def _entrar(self):
+        with self._vaga:
+            while self._em_andamento >= self.limite:
+                self._vaga.wait()
+            self._em_andamento += 1
+            self.requisicoes += 1
+
+    def _sair(self, latencia=None, erro=False):
+        with self._vaga:
+            self._em_andamento -= 1
+            if erro:
+                self._reduzir()
+            elif latencia is not None:
+                self.latencia_media = latencia if self.latencia_media is None else 0.8 * self.latencia_media + 0.2 * latencia
+                if self.latencia_media > self.latencia_alvo:
+                    self._reduzir()
+                else:
+                    # Aumento aditivo: +1 a cada `limite` respostas boas seguidas
+                    self._sucessos += 1
+                    if self._sucessos >= self.limite:
+                        self.limite = min(self.concorrencia_maxima, self.limite + 1)
+                        self._sucessos = 0
+            self._vaga.notify_all()
+
+    def _reduzir(self):
+        """Redução multiplicativa, no máximo uma vez por latência média (as respostas em voo refletem o limite antigo)"""
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < max(1.0, self.latencia_media or 0.0):
+            return
+        self._ultima_reducao = agora
+        self.limite = max(1, self.limite // 2)
+        self._sucessos = 0
@@ -14,12 +14,16 @@ load_dotenv()
 import google_auth_oauthlib.flow
 import googleapiclient.discovery
 import googleapiclient.errors
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, build_http
+import google_auth_httplib2
 
 # Para gerenciamento e renovação das credenciais
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 
+# Gravação/replay das chamadas HTTP para benchmarks offline
+from src.replayTransport import Cassete, HttpGravacao, HttpReplay, HTTP_RECORD_DIR, HTTP_REPLAY_URL
+
 # Escopos atualizados para upload e leitura
 SCOPES = [
     "https://www.googleapis.com/auth/youtube.upload",
@@ -55,8 +59,15 @@ class YouTubeUploader:
         Realiza a autenticação com a API do YouTube usando OAuth 2.0.
         Armazena as credenciais em um arquivo (token.json) para evitar a necessidade
         de login a cada execução.
+        Com HTTP_REPLAY_URL, não autentica: as chamadas são respondidas pelo ServidorReplay.
+        Com HTTP_RECORD_DIR, as respostas da API são gravadas para replay posterior.
         """
 
+        if HTTP_REPLAY_URL:
+            self.youtube = googleapiclient.discovery.build("youtube", "v3", http=HttpReplay(build_http()))
+            print("Usando respostas gravadas do YouTube em:", HTTP_REPLAY_URL)
+            return
+
         token_path = os.path.join(self.project_root, 'token.json')
         creds = None
 
@@ -99,7 +110,11 @@ class YouTubeUploader:
                     token_file.write(creds.to_json())
         
         # Inicializa o serviço da API do YouTube com as credenciais obtidas
-        self.youtube = googleapiclient.discovery.build("youtube", "v3", credentials=creds)
+        if HTTP_RECORD_DIR:
+            http = HttpGravacao(google_auth_httplib2.AuthorizedHttp(creds, http=build_http()), Cassete(HTTP_RECORD_DIR))
+            self.youtube = googleapiclient.discovery.build("youtube", "v3", http=http)
+        else:
+            self.youtube = googleapiclient.discovery.build("youtube", "v3", credentials=creds)
         print("Autenticação realizada com sucesso!")
 
     def test_connection(self):
@@ -362,8 +377,8 @@ class YouTubeUploader:
         
         Retorna True se todos os testes forem bem-sucedidos; caso contrário, retorna False.
         """
-        # Verifica a existência do arquivo de credenciais
-        if not os.path.exists(self.client_secrets_file):
+        # Verifica a existência do arquivo de credenciais (dispensável no replay)
+        if not HTTP_REPLAY_URL and not os.path.exists(self.client_secrets_file):
             print("❌ Erro: Arquivo client_secrets.json não encontrado em:", self.client_secrets_file)
             return False
 
@@ -1,18 +1,35 @@
 import os
+import re
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 from moviepy.editor import *
 import moviepy.config as mpy_config
 from moviepy.audio.fx import all as afx
 from dotenv import load_dotenv
+from src.transcodeWorker import caminho_normalizado
+from src.audioMetadata import duracao_audio
+from src.narrationStorage import arquivo_narracao, carregar_narracao
+from src.scriptDocument import carregar_documento
 
 load_dotenv()
 
 mpy_config.IMAGEMAGICK_BINARY = os.getenv('IMAGEMAGICK_PATH')
 
 class VideoMaker:
-    def __init__(self, audio_dir=os.path.join("output", "audio")):
+    def __init__(self, audio_dir=os.path.join("output", "audio"), biblioteca_musical=None, output_dir="output", threads=None):
         self.audio_dir = audio_dir
+        self.biblioteca_musical = biblioteca_musical
+        self.output_dir = output_dir
+        self.threads = threads  # Threads do ffmpeg em cada write_videofile (None = padrão do moviepy)
+
+    @staticmethod
+    def listar_clipes(download_dir):
+        """Os video_N.mp4 que existem na pasta, em ordem de N"""
+        if not os.path.isdir(download_dir):
+            return []
+        numeros = sorted(int(correspondencia.group(1)) for correspondencia in
+                         (re.fullmatch(r"video_(\d+)\.mp4", nome) for nome in os.listdir(download_dir)) if correspondencia)
+        return [f"video_{numero}.mp4" for numero in numeros]
 
     def quebrar_texto(self, texto, largura_maxima, fonte):
         linhas = []
@@ -77,43 +94,28 @@ class VideoMaker:
 
         return img
 
-    def carregar_roteiro(self, script_path="scripts/roteiro.txt"):
-        narracoes = {}
-
-        try:
-            with open(script_path, "r", encoding="utf-8") as file:
-                linhas = file.readlines()
-
-            narracao_id = 0
-
-            for linha in linhas:
-                linha = linha.strip()
-
-                if linha.startswith("NARRACAO:"):
-                    continue  
-
-                if linha and linha[0].isdigit() and "." in linha:
-                    texto_completo = linha.split(". ", 1)[1]
-                    narracao_id += 1
-                    partes = texto_completo.split(",")
-
-                    narracoes[narracao_id] = [parte.strip() for parte in partes if parte.strip()]
-
-            return narracoes
-
-        except Exception as e:
-            return {}
-
-    def criar_video(self, download_dir, music=None, output_file="final_video.mp4", tempo_total_desejado=80, tempo_maximo_por_video=10):
+    def escolher_musica(self, duracao, humor=None):
+        """Escolhe uma música da biblioteca local com pelo menos `duracao` segundos (sem acessar a rede)"""
+        if self.biblioteca_musical is None:
+            return None
+        faixa = self.biblioteca_musical.escolher(duracao, humor)
+        if faixa is None:
+            return None
+        print(f"🎵 Música escolhida: {faixa['titulo']} ({faixa['duracao']:.0f}s, {faixa['humor']})")
+        return faixa["caminho"]
+
+    def criar_video(self, download_dir, music=None, output_file="final_video.mp4", tempo_total_desejado=80, tempo_maximo_por_video=10, humor_musica=None):
         clips = []
         screen_width, screen_height = 1080, 1920
         tempo_acumulado = 0
 
-        for i in range(1, 100):
+        for nome_clipe in self.listar_clipes(download_dir):
             if tempo_acumulado >= tempo_total_desejado:
                 break
 
-            video_path = os.path.join(download_dir, f"video_{i}.mp4")
+            video_path = os.path.join(download_dir, nome_clipe)
+            # Prefer the clip already normalized by the TranscodeWorker
+            video_path = caminho_normalizado(download_dir, nome_clipe) or video_path
             if os.path.exists(video_path):
                 video_clip = VideoFileClip(video_path)
                 duracao_video = min(video_clip.duration, tempo_maximo_por_video)
@@ -123,6 +125,11 @@ class VideoMaker:
 
                 video_clip = video_clip.subclip(0, duracao_video)
 
+                if (video_clip.w, video_clip.h) == (screen_width, screen_height):
+                    clips.append(video_clip)
+                    tempo_acumulado += duracao_video
+                    continue
+
                 proporcao_video = video_clip.w / video_clip.h
                 proporcao_tela = screen_width / screen_height
 
@@ -152,6 +159,9 @@ class VideoMaker:
 
         final_clip = concatenate_videoclips(clips_com_transicoes, method="compose")
 
+        if music is None:
+            music = self.escolher_musica(final_clip.duration, humor_musica)
+
         if music is not None:
             audio_clip = AudioFileClip(music)
 
@@ -162,10 +172,9 @@ class VideoMaker:
 
             final_clip = final_clip.set_audio(audio_clip)
 
-        output_dir = os.path.join('output')
-        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
 
-        final_clip.write_videofile(os.path.join(output_dir, output_file), fps=24)
+        final_clip.write_videofile(os.path.join(self.output_dir, output_file), fps=24, threads=self.threads)
 
         final_clip.close()
         for clip in clips:
@@ -173,15 +182,16 @@ class VideoMaker:
 
     def adicionar_texto_e_audio(self, video_final_path, output_file="final_video_com_audio.mp4", script_file="scripts/roteiro.txt",
                                 volume_narracao=1.5, volume_musica=0.2):
+        """:param script_file: ScriptDocument já interpretado ou caminho do roteiro."""
         if not os.path.exists(video_final_path):
             return  
 
         video_clip = VideoFileClip(video_final_path)
         screen_width, screen_height = video_clip.size
         audio_original = video_clip.audio.fx(afx.volumex, volume_musica)
-        narracoes = self.carregar_roteiro(script_file)
+        documento = carregar_documento(script_file)  # O mesmo ScriptDocument usado na geração dos áudios
         print("=== Adicionando texto e áudio ao vídeo ===")
-        print(narracoes)
+        print(documento)
         print("=== Adicionando texto e áudio ao vídeo ===")
         clipes_texto = []
         clipes_audio = []
@@ -190,28 +200,27 @@ class VideoMaker:
         fonte_tamanho = int(screen_width * 0.05)
         fonte = ImageFont.truetype(fonte_path, fonte_tamanho)
 
-        for narracao_id, partes_texto in narracoes.items():
+        for narracao_id, texto_linha, partes in documento.narracoes:
             print("=== Adicionando partes_texto ===")
-            print(partes_texto)
+            print(texto_linha)
             print("=== Adicionando partes_texto ===")
-            parte_id = 1
-            for texto in partes_texto:
-                audio_path = os.path.join(self.audio_dir, f"narracao_{narracao_id}_{parte_id}.wav")
+            for parte_id, texto in partes:
+                audio_path = arquivo_narracao(self.audio_dir, narracao_id, parte_id)  # .wav ou .ogg (NARRATION_FORMAT)
                 print(f"=== Adicionando áudio {audio_path} ===")
                 if os.path.exists(audio_path):
-                    audio_clip = AudioFileClip(audio_path).fx(afx.volumex, volume_narracao)
+                    audio_clip = carregar_narracao(audio_path).fx(afx.volumex, volume_narracao)
+                    duracao = duracao_audio(audio_path)  # Mesma medida usada no total do processar_roteiro
                     texto_formatado = self.quebrar_texto(texto, int(screen_width * 0.95), fonte)
                     texto_clip = self.criar_texto_estilizado(texto_formatado, int(screen_width * 0.95), screen_height // 2)
-                    texto_clip = ImageClip(np.array(texto_clip)).set_duration(audio_clip.duration).set_position(("center", "center")).set_start(tempo_atual)
+                    texto_clip = ImageClip(np.array(texto_clip)).set_duration(duracao).set_position(("center", "center")).set_start(tempo_atual)
                     clipes_texto.append(texto_clip)
                     clipes_audio.append(audio_clip.set_start(tempo_atual))
-                    tempo_atual += audio_clip.duration
+                    tempo_atual += duracao
                 else:
                     print(f"Áudio não encontrado para narração {narracao_id}, parte {parte_id}")
-                parte_id += 1
 
         texto_final = CompositeVideoClip([video_clip] + clipes_texto).set_audio(CompositeAudioClip([audio_original, CompositeAudioClip(clipes_audio)]))
-        texto_final.write_videofile(os.path.join("output", output_file), fps=24)
+        texto_final.write_videofile(os.path.join(self.output_dir, output_file), fps=24, threads=self.threads)
 
 if __name__ == "__main__":
     vm = VideoMaker()
@@ -0,0 +1,138 @@
+import os
+import re
+import socket
+import shutil
+import tempfile
+import subprocess
+import threading
+import unittest
+import urllib.request
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from src.ffmpegTools import executar_ffmpeg, caminho_ffmpeg
+from src.partialFetch import BaixadorParcial
+
+DURACAO_AMOSTRA = 40
+DURACAO_TRECHO = 10
+
+class _Servidor(SimpleHTTPRequestHandler):
+    """Serve a pasta das amostras com suporte a Range (se `aceita_range`) e conta os bytes enviados"""
+
+    aceita_range = True
+    bytes_enviados = None
+
+    def setup(self):
+        super().setup()
+        # Buffer de envio pequeno: o que o ffmpeg abandona ao fechar a conexão quase não entra na contagem
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 65536)
+
+    def do_GET(self):
+        caminho = self.translate_path(self.path)
+        if not os.path.isfile(caminho):
+            self.send_error(404)
+            return
+        tamanho = os.path.getsize(caminho)
+        inicio, fim = 0, tamanho - 1
+        intervalo = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if self.aceita_range and intervalo:
+            inicio = int(intervalo.group(1))
+            fim = min(int(intervalo.group(2) or fim), fim)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {inicio}-{fim}/{tamanho}")
+        else:
+            self.send_response(200)
+        if self.aceita_range:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(fim - inicio + 1))
+        self.end_headers()
+        with open(caminho, "rb") as arquivo:
+            arquivo.seek(inicio)
+            restante = fim - inicio + 1
+            try:
+                while restante > 0:
+                    bloco = arquivo.read(min(65536, restante))
+                    self.wfile.write(bloco)
+                    self.bytes_enviados[os.path.basename(caminho)] += len(bloco)
+                    restante -= len(bloco)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # O ffmpeg fecha a conexão assim que tem o que precisa
+
+    def log_message(self, *args):
+        pass
+
+def duracao(caminho):
+    """Duração (segundos) de um arquivo de mídia, lida da saída do ffmpeg"""
+    saida = subprocess.run([caminho_ffmpeg(), "-hide_banner", "-i", caminho], capture_output=True, text=True).stderr
+    horas, minutos, segundos = re.search(r"Duration: (\d+):(\d+):([\d.]+)", saida).groups()
+    return int(horas) * 3600 + int(minutos) * 60 + float(segundos)
+
+def download_completo(url, destino, progresso=None):
+    with urllib.request.urlopen(url) as resposta, open(destino, "wb") as arquivo:
+        shutil.copyfileobj(resposta, arquivo)
+    return True
+
+@unittest.skipUnless(shutil.which(caminho_ffmpeg()) or os.path.exists(caminho_ffmpeg()), "ffmpeg não encontrado")
+class TestBaixadorParcial(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.diretorio = tempfile.mkdtemp()
+        cls.amostras = os.path.join(cls.diretorio, "amostras")
+        os.makedirs(cls.amostras)
+        # O mesmo vídeo com o moov no fim (padrão do ffmpeg) e no início (faststart)
+        for nome, movflags in (("moov_fim.mp4", []), ("faststart.mp4", ["-movflags", "+faststart"])):
+            sucesso, erro = executar_ffmpeg([
+                "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=24:duration={DURACAO_AMOSTRA}",
+                "-f", "lavfi", "-i", f"sine=duration={DURACAO_AMOSTRA}",
+                "-c:v", "libx264", "-preset", "ultrafast", "-g", "24", "-pix_fmt", "yuv420p",
+                "-b:v", "4M", "-minrate", "4M", "-maxrate", "4M", "-bufsize", "1M", "-x264-params", "nal-hrd=cbr",
+                "-c:a", "aac", *movflags, os.path.join(cls.amostras, nome),
+            ])
+            if not sucesso:
+                raise unittest.SkipTest(f"Não foi possível gerar a amostra {nome}: {erro}")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.diretorio, ignore_errors=True)
+
+    def servir(self, aceita_range=True):
+        """Sobe um ThreadingHTTPServer local com as amostras e retorna (url_base, bytes_enviados)"""
+        bytes_enviados = {nome: 0 for nome in os.listdir(self.amostras)}
+        handler = type("Handler", (_Servidor,), {"aceita_range": aceita_range, "bytes_enviados": bytes_enviados})
+        servidor = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=self.amostras))
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+        return f"http://127.0.0.1:{servidor.server_address[1]}", bytes_enviados
+
+    def baixar(self, url, nome, chamadas_completo):
+        def completo(url, destino, progresso=None):
+            chamadas_completo.append(url)
+            return download_completo(url, destino, progresso)
+
+        destino = os.path.join(self.diretorio, f"{self.id()}_{nome}")
+        baixador = BaixadorParcial(DURACAO_TRECHO, download_completo=completo, gravando=False)
+        self.assertTrue(baixador.baixar(f"{url}/{nome}", destino))
+        return destino
+
+    def test_trecho_inicial_com_range(self):
+        url, bytes_enviados = self.servir()
+        for nome in ("moov_fim.mp4", "faststart.mp4"):
+            with self.subTest(nome):
+                chamadas_completo = []
+                destino = self.baixar(url, nome, chamadas_completo)
+                self.assertEqual(chamadas_completo, [])
+                self.assertAlmostEqual(duracao(destino), DURACAO_TRECHO, delta=0.5)
+                tamanho = os.path.getsize(os.path.join(self.amostras, nome))
+                self.assertLess(bytes_enviados[nome], tamanho * 0.6)
+
+    def test_servidor_sem_range_cai_no_download_completo(self):
+        url, _ = self.servir(aceita_range=False)
+        chamadas_completo = []
+        destino = self.baixar(url, "moov_fim.mp4", chamadas_completo)
+        self.assertEqual(chamadas_completo, [f"{url}/moov_fim.mp4"])
+        self.assertAlmostEqual(duracao(destino), DURACAO_AMOSTRA, delta=0.5)
+
+if __name__ == "__main__":
+    unittest.main()